@@ -3,16 +3,10 @@
 Run the backend with MCP server as subprocess
 No separate MCP server needed - it runs as subprocess via stdio
 """
-import sys
-from pathlib import Path
+from src.backend.config import get_settings, uvicorn_options
 
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
 
-from src.backend.config import get_settings
-
-if __name__ == "__main__":
+def main():
     import uvicorn
     
     settings = get_settings()
@@ -34,5 +28,9 @@ if __name__ == "__main__":
         "src.backend.main_subprocess:app",
         host=settings.backend_host,
         port=settings.backend_port,
-        reload=True
-    )
\ No newline at end of file
+        **uvicorn_options(workers=settings.workers)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,10 @@
 """
 Run the FastMCP server with HTTP transport for backend compatibility
 """
-import sys
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
 from src.mcp_server.fastmcp_server import mcp
 
-if __name__ == "__main__":
+
+def main():
     print("Starting FastMCP server with HTTP transport on port 8001...")
     print("Press Ctrl+C to stop")
     
@@ -20,4 +14,8 @@ if __name__ == "__main__":
         transport="sse",
         host="localhost", 
         port=8001
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    main()
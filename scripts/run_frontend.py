@@ -1,8 +1,35 @@
+import os
+import signal
 import subprocess
 import sys
 from pathlib import Path
 
-if __name__ == "__main__":
+
+def main():
     frontend_path = Path(__file__).parent.parent / "src" / "frontend" / "app.py"
     print(frontend_path)
-    subprocess.run([sys.executable, "-m", "streamlit", "run", str(frontend_path)])
\ No newline at end of file
+    
+    # No inherited stdin, and a process group of its own so Ctrl+C is handled
+    # here and the whole Streamlit process tree is stopped together
+    if sys.platform == "win32":
+        session = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        session = {"start_new_session": True}
+    
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(frontend_path)],
+        stdin=subprocess.DEVNULL,
+        **session
+    )
+    try:
+        process.wait()
+    except KeyboardInterrupt:
+        if sys.platform == "win32":
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,58 @@ This script manages the React development server, handling
 npm dependencies installation and starting the development server.
 """
 
+import json
 import os
+import signal
 import sys
 import subprocess
 import shutil
+import time
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Node/npm versions are cached here so that most launches spawn no processes
+VERSION_CACHE = Path(__file__).parent.parent / ".cache" / "node_version.json"
+VERSION_CACHE_TTL = 24 * 60 * 60
+
+def _load_version_cache(key):
+    """Return cached versions for this node binary, or None if missing/stale."""
+    try:
+        cached = json.loads(VERSION_CACHE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != key or time.time() - cached.get("checked_at", 0) > VERSION_CACHE_TTL:
+        return None
+    return cached
+
+def _save_version_cache(key, node_version, npm_version):
+    try:
+        VERSION_CACHE.parent.mkdir(exist_ok=True)
+        VERSION_CACHE.write_text(json.dumps({
+            "key": key,
+            "checked_at": time.time(),
+            "node": node_version,
+            "npm": npm_version
+        }))
+    except OSError:
+        pass  # caching is best effort
 
 def check_node_npm():
     """Check if Node.js and npm are installed."""
+    node_path = shutil.which("node")
+    npm_path = shutil.which("npm")
+    if not node_path or not npm_path:
+        print("[ERROR] Node.js and npm are required to run the React frontend.")
+        print("Please install Node.js from: https://nodejs.org/")
+        return False
+    
+    # Keyed on the binary location and mtime, so upgrading Node invalidates it
+    key = f"{node_path}:{os.path.getmtime(node_path)}"
+    cached = _load_version_cache(key)
+    if cached:
+        print(f"[OK] Node.js found: {cached['node']}")
+        print(f"[OK] npm found: {cached['npm']}")
+        return True
+    
     try:
         # Use shell=True on Windows for better command resolution
         use_shell = sys.platform == "win32"
@@ -27,8 +68,8 @@ def check_node_npm():
             text=True,
             check=True,
             shell=use_shell
-        )
-        print(f"[OK] Node.js found: {node_version.stdout.strip()}")
+        ).stdout.strip()
+        print(f"[OK] Node.js found: {node_version}")
         
         npm_version = subprocess.run(
             ["npm", "--version"],
@@ -36,19 +77,28 @@ def check_node_npm():
             text=True,
             check=True,
             shell=use_shell
-        )
-        print(f"[OK] npm found: {npm_version.stdout.strip()}")
+        ).stdout.strip()
+        print(f"[OK] npm found: {npm_version}")
+        
+        _save_version_cache(key, node_version, npm_version)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         print(f"[ERROR] Node.js and npm are required to run the React frontend. Error: {e}")
         print("Please install Node.js from: https://nodejs.org/")
         return False
 
+def dependencies_up_to_date(frontend_dir):
+    """True if node_modules was installed after package.json last changed."""
+    # npm writes this lockfile on every install
+    installed_lock = frontend_dir / "node_modules" / ".package-lock.json"
+    try:
+        return installed_lock.stat().st_mtime >= (frontend_dir / "package.json").stat().st_mtime
+    except OSError:
+        return False
+
 def install_dependencies(frontend_dir):
     """Install npm dependencies if needed."""
-    node_modules = frontend_dir / "node_modules"
-    
-    if not node_modules.exists():
+    if not dependencies_up_to_date(frontend_dir):
         print("[INFO] Installing npm dependencies...")
         try:
             use_shell = sys.platform == "win32"
@@ -80,6 +130,15 @@ def start_react_server(frontend_dir):
     env = os.environ.copy()
     env["BROWSER"] = "none"  # Don't auto-open browser
     env["PORT"] = "3000"  # Ensure port 3000
+    # react-scripts exits when stdin closes unless it runs in CI mode
+    env["CI"] = "true"
+    
+    # No inherited stdin, and a process group of its own so Ctrl+C is handled
+    # here and the whole npm/node process tree is stopped together
+    if sys.platform == "win32":
+        session = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        session = {"start_new_session": True}
     
     try:
         # Run npm start
@@ -88,7 +147,9 @@ def start_react_server(frontend_dir):
             ["npm", "start"],
             cwd=frontend_dir,
             env=env,
-            shell=use_shell
+            shell=use_shell,
+            stdin=subprocess.DEVNULL,
+            **session
         )
         
         print("[STARTING] React frontend is starting on http://localhost:3000")
@@ -97,7 +158,10 @@ def start_react_server(frontend_dir):
         process.wait()
     except KeyboardInterrupt:
         print("\n\nShutting down React frontend...")
-        process.terminate()
+        if sys.platform == "win32":
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
         process.wait(timeout=5)
     except Exception as e:
         print(f"[ERROR] Error running React frontend: {e}")
@@ -2,14 +2,13 @@
 """
 Run the hybrid MCP server (FastMCP + REST API)
 """
-import sys
-from pathlib import Path
+from src.backend.config import configure_logging, mcp_server_workers, uvicorn_options
 
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# Module level so worker/reload processes, which re-import this script, log too
+configure_logging()
 
-if __name__ == "__main__":
+
+def main():
     import uvicorn
     
     print("Starting Hybrid MCP Server on port 8001...")
@@ -20,5 +19,9 @@ if __name__ == "__main__":
         "src.mcp_server.hybrid_server:app",
         host="localhost",
         port=8001,
-        reload=True
-    )
\ No newline at end of file
+        **uvicorn_options(workers=mcp_server_workers())
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
 import uvicorn
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.backend.config import configure_logging, mcp_server_workers, uvicorn_options
 
-if __name__ == "__main__":
+# Module level so worker/reload processes, which re-import this script, log too
+configure_logging()
+
+
+def main():
     uvicorn.run(
         "src.mcp_server.server:app",
         host="localhost",
         port=8001,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+        log_level="info",
+        **uvicorn_options(workers=mcp_server_workers())
+    )
+
+
+if __name__ == "__main__":
+    main()
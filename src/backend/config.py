@@ -1,10 +1,21 @@
-from pydantic_settings import BaseSettings
-from pydantic import Field, validator
-from typing import Optional
+import logging
+import os
+from importlib.util import find_spec
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator
+from typing import Optional, Dict, Any, List
 from functools import lru_cache
 
 
 class Settings(BaseSettings):
+    # Frozen: the cached instance from get_settings() is shared by every module
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True
+    )
+    
     openai_api_key: str = Field(..., description="OpenAI API key")
     mcp_server_host: str = Field(default="localhost", description="MCP server host")
     mcp_server_port: int = Field(default=8001, description="MCP server port")
@@ -13,25 +24,95 @@ class Settings(BaseSettings):
     model_name: str = Field(default="gpt-4o-mini", description="OpenAI model name")
     max_tokens: int = Field(default=1000, description="Maximum tokens for response")
     temperature: float = Field(default=0.7, description="Temperature for model response")
+    max_history: int = Field(default=50, description="Messages kept per conversation")
+    system_prompt: Optional[str] = Field(default=None, description="System message sent ahead of every conversation")
+    workers: int = Field(default=1, description="Uvicorn worker processes (ignored with DEV_RELOAD=1)")
+    tools_refresh_interval: int = Field(default=300, description="Seconds between MCP tool list refreshes")
+    cors_origins: List[str] = Field(
+        default=[
+            "http://localhost:3000",
+            "http://127.0.0.1:3000",
+            "http://localhost:8501",
+            "http://127.0.0.1:8501"
+        ],
+        description="Origins allowed to call the backend from a browser"
+    )
     
-    @validator('temperature')
+    @field_validator('temperature')
+    @classmethod
     def validate_temperature(cls, v):
         if not 0 <= v <= 2:
             raise ValueError('Temperature must be between 0 and 2')
         return v
     
-    @validator('max_tokens')
+    @field_validator('max_tokens')
+    @classmethod
     def validate_max_tokens(cls, v):
         if v < 1:
             raise ValueError('Max tokens must be at least 1')
         return v
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    @field_validator('max_history')
+    @classmethod
+    def validate_max_history(cls, v):
+        if v < 1:
+            raise ValueError('Max history must be at least 1')
+        return v
+    
+    @field_validator('workers')
+    @classmethod
+    def validate_workers(cls, v):
+        if v < 1:
+            raise ValueError('Workers must be at least 1')
+        return v
 
 
-@lru_cache()
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    return Settings()
\ No newline at end of file
+    return Settings()
+
+
+def reload_enabled() -> bool:
+    """Uvicorn auto-reload is opt-in via DEV_RELOAD=1"""
+    return os.getenv("DEV_RELOAD") == "1"
+
+
+def configure_logging(level: int = logging.INFO):
+    """Root logging setup for the server entrypoints (modules only get loggers)"""
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def mcp_server_workers() -> int:
+    """Worker processes for the MCP servers, whose tool calls are light and stateless
+    
+    Workers share nothing: each serves its own /sse streams and keeps its own
+    tool caches (e.g. the weather TTL cache).
+    """
+    return min(4, os.cpu_count() or 1)
+
+
+def uvicorn_options(workers: int = 1) -> Dict[str, Any]:
+    """Event loop/HTTP parser, reload and worker keyword arguments for uvicorn.run
+    
+    Auto-reload and multiple workers are mutually exclusive in uvicorn, so
+    `workers` only applies when DEV_RELOAD is not set.
+    """
+    # uvloop and httptools are C implementations; uvloop is not available on Windows
+    options: Dict[str, Any] = {
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+    }
+    if not reload_enabled():
+        return {**options, "reload": False, "workers": workers}
+    # Only watch the Python sources, not node_modules, .git or build artifacts.
+    # Include/exclude patterns require watchfiles (uvicorn picks it up automatically).
+    return {
+        **options,
+        "reload": True,
+        "reload_dirs": ["src"],
+        "reload_includes": ["*.py"],
+        "reload_excludes": ["src/frontend_react/node_modules", ".venv"],
+    }
@@ -1,25 +1,43 @@
-import uuid
-from typing import Dict, List, Optional
-from datetime import datetime
+import secrets
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 import logging
+import time
 
-from .models import Conversation, Message, MessageRole
+from .models import Conversation, Message, MessageRole, ns_to_datetime
 
 logger = logging.getLogger(__name__)
 
 
 class ConversationManager:
-    def __init__(self):
+    def __init__(self, max_history: Optional[int] = None):
+        # Older messages are evicted once a conversation exceeds max_history
+        self.max_history = max_history
         self.conversations: Dict[str, Conversation] = {}
+        # Each conversation's messages in Chat Completions form, appended as they
+        # are added so a request never has to convert the whole history
+        self.openai_messages: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Summaries served by list_conversations, updated in place on every write
+        self._summaries: Dict[str, Dict] = {}
     
-    def create_conversation(self) -> str:
-        conversation_id = str(uuid.uuid4())
-        self.conversations[conversation_id] = Conversation(
+    def create_conversation(self, now: Optional[int] = None) -> str:
+        conversation_id = secrets.token_hex(16)
+        now = now or time.time_ns()
+        conversation = Conversation(
             id=conversation_id,
-            messages=[],
-            created_at=datetime.now(),
-            updated_at=datetime.now()
+            messages=deque(maxlen=self.max_history),
+            created_at=now,
+            updated_at=now
         )
+        self.conversations[conversation_id] = conversation
+        self.openai_messages[conversation_id] = deque(maxlen=self.max_history)
+        created_at = ns_to_datetime(now).isoformat()
+        self._summaries[conversation_id] = {
+            "id": conversation_id,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "message_count": 0
+        }
         logger.info(f"Created new conversation: {conversation_id}")
         return conversation_id
     
@@ -31,45 +49,53 @@ class ConversationManager:
         conversation_id: str,
         role: MessageRole,
         content: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        now: Optional[int] = None
     ) -> bool:
         conversation = self.get_conversation(conversation_id)
         if not conversation:
             logger.error(f"Conversation {conversation_id} not found")
             return False
         
-        message = Message(
-            role=role,
+        now = now or time.time_ns()
+        # Everything here comes from our own code, so skip pydantic validation
+        message = Message.model_construct(
+            role=MessageRole(role).value,
             content=content,
-            timestamp=datetime.now(),
+            timestamp=now,
             metadata=metadata
         )
         
         conversation.messages.append(message)
-        conversation.updated_at = datetime.now()
+        self.openai_messages[conversation_id].append(message.to_openai_dict())
+        conversation.message_count += 1
+        conversation.updated_at = now
+        
+        summary = self._summaries[conversation_id]
+        summary["updated_at"] = ns_to_datetime(now).isoformat()
+        summary["message_count"] = conversation.message_count
         logger.info(f"Added message to conversation {conversation_id}")
         return True
     
-    def get_messages(self, conversation_id: str) -> List[Message]:
+    def get_messages(self, conversation_id: str) -> Deque[Message]:
         conversation = self.get_conversation(conversation_id)
         if conversation:
             return conversation.messages
-        return []
+        return deque()
+    
+    def get_openai_messages(self, conversation_id: str) -> Deque[Dict[str, Any]]:
+        return self.openai_messages.get(conversation_id, deque())
     
     def delete_conversation(self, conversation_id: str) -> bool:
         if conversation_id in self.conversations:
             del self.conversations[conversation_id]
+            del self.openai_messages[conversation_id]
+            del self._summaries[conversation_id]
             logger.info(f"Deleted conversation {conversation_id}")
             return True
         return False
     
     def list_conversations(self) -> List[Dict]:
-        return [
-            {
-                "id": conv.id,
-                "created_at": conv.created_at.isoformat(),
-                "updated_at": conv.updated_at.isoformat(),
-                "message_count": len(conv.messages)
-            }
-            for conv in self.conversations.values()
-        ]
\ No newline at end of file
+        # Copies, so callers cannot change the manager's own summaries; the
+        # timestamps inside are already formatted
+        return [summary.copy() for summary in self._summaries.values()]
\ No newline at end of file
@@ -1,14 +1,21 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+import orjson
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-from .config import get_settings
-from .models import ChatRequest, ChatResponse, MessageRole
-from .openai_client import OpenAIClient
-from .mcp_client import MCPClient
+from .config import get_settings, uvicorn_options
+from .models import ChatRequest, ChatResponse, MessageRole, ToolCall, ns_to_datetime
 from .conversation_manager import ConversationManager
 
+if TYPE_CHECKING:
+    from .openai_client import OpenAIClient
+    from .mcp_client import MCPClient
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -16,16 +23,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-conversation_manager = ConversationManager()
-openai_client = OpenAIClient(settings)
-mcp_client = MCPClient(settings)
+conversation_manager = ConversationManager(max_history=settings.max_history)
+# Clients (and the openai/httpx imports behind them) are created in lifespan
+openai_client: Optional["OpenAIClient"] = None
+mcp_client: Optional["MCPClient"] = None
+
+
+async def refresh_openai_tools(app: FastAPI) -> List[Dict[str, Any]]:
+    """Fetch MCP tools and swap in the OpenAI-formatted list, keeping the old one on failure"""
+    tools = await mcp_client.get_available_tools()
+    if tools:
+        app.state.openai_tools = mcp_client.convert_tools_to_openai_format(tools)
+    return app.state.openai_tools
+
+
+async def refresh_openai_tools_periodically(app: FastAPI):
+    while True:
+        await asyncio.sleep(settings.tools_refresh_interval)
+        await refresh_openai_tools(app)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global openai_client, mcp_client
+    from .openai_client import OpenAIClient
+    from .mcp_client import MCPClient
+    
     logger.info("Starting up backend server...")
+    openai_client = OpenAIClient(settings)
+    mcp_client = MCPClient(settings)
+    app.state.openai_tools = []
+    await refresh_openai_tools(app)
+    refresh_task = asyncio.create_task(refresh_openai_tools_periodically(app))
     yield
     logger.info("Shutting down backend server...")
+    refresh_task.cancel()
     await mcp_client.close()
 
 
@@ -33,15 +65,17 @@ app = FastAPI(
     title="Chatbot Backend",
     description="Backend API for OpenAI and MCP integration",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # let browsers cache preflight responses for a day
 )
 
 
@@ -50,29 +84,81 @@ async def health_check():
     return {"status": "healthy", "service": "chatbot-backend"}
 
 
+def request_time() -> int:
+    """Timestamp (epoch ns) of the request's arrival, shared by what is recorded before the first await"""
+    return time.time_ns()
+
+
+def get_or_create_conversation(conversation_id: Optional[str], now: int) -> str:
+    """Return the requested conversation ID, starting a new conversation if it is unknown"""
+    if conversation_id and conversation_manager.get_conversation(conversation_id):
+        return conversation_id
+    return conversation_manager.create_conversation(now=now)
+
+
+async def run_tool_calls(
+    conversation_id: str,
+    response_content: str,
+    tool_calls: List[ToolCall]
+) -> List[str]:
+    """Record the tool-call turn, execute the tools and record their results"""
+    # Add assistant message with tool calls
+    conversation_manager.add_message(
+        conversation_id,
+        MessageRole.ASSISTANT,
+        response_content or "",
+        metadata={"tool_calls": [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in tool_calls]}
+    )
+    
+    # Tool calls are independent, so run them concurrently and record
+    # the results in the original order afterwards
+    tool_responses = await asyncio.gather(
+        *(mcp_client.execute_tool(tool_call) for tool_call in tool_calls),
+        return_exceptions=True
+    )
+    
+    # The results arrive together, so they share one timestamp
+    now = time.time_ns()
+    for tool_call, tool_response in zip(tool_calls, tool_responses):
+        if isinstance(tool_response, Exception):
+            logger.error(f"Error executing tool {tool_call.name}: {str(tool_response)}")
+            content = f"Error: {tool_response}"
+        elif tool_response.error:
+            content = f"Error: {tool_response.error}"
+        else:
+            content = str(tool_response.result)
+        
+        # Every tool call needs a tool message, failed ones included
+        conversation_manager.add_message(
+            conversation_id,
+            MessageRole.TOOL,
+            content,
+            metadata={"tool_call_id": tool_call.id, "tool_name": tool_call.name},
+            now=now
+        )
+    
+    return [tool_call.name for tool_call in tool_calls]
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, now: int = Depends(request_time)):
     try:
-        if not request.conversation_id:
-            conversation_id = conversation_manager.create_conversation()
-        else:
-            conversation_id = request.conversation_id
-            if not conversation_manager.get_conversation(conversation_id):
-                conversation_id = conversation_manager.create_conversation()
+        conversation_id = get_or_create_conversation(request.conversation_id, now)
         
         conversation_manager.add_message(
             conversation_id,
             MessageRole.USER,
-            request.message
+            request.message,
+            now=now
         )
         
-        messages = conversation_manager.get_messages(conversation_id)
+        messages = conversation_manager.get_openai_messages(conversation_id)
         
         tools_used = []
         
         if request.use_tools:
-            tools = await mcp_client.get_available_tools()
-            openai_tools = mcp_client.convert_tools_to_openai_format(tools)
+            # Tools are cached at startup; only refetch if the MCP server was not up yet
+            openai_tools = app.state.openai_tools or await refresh_openai_tools(app)
             
             response_content, tool_calls = await openai_client.generate_response(
                 messages,
@@ -81,29 +167,10 @@ async def chat(request: ChatRequest):
             )
             
             if tool_calls:
-                # Add assistant message with tool calls
-                conversation_manager.add_message(
-                    conversation_id,
-                    MessageRole.ASSISTANT,
-                    response_content or "",
-                    metadata={"tool_calls": [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in tool_calls]}
-                )
+                tools_used = await run_tool_calls(conversation_id, response_content, tool_calls)
                 
-                for tool_call in tool_calls:
-                    tool_response = await mcp_client.execute_tool(tool_call)
-                    tools_used.append(tool_call.name)
-                    
-                    if not tool_response.error:
-                        # Add tool response message
-                        conversation_manager.add_message(
-                            conversation_id,
-                            MessageRole.TOOL,
-                            str(tool_response.result),
-                            metadata={"tool_call_id": tool_call.id, "tool_name": tool_response.tool_name}
-                        )
-                
-                # Get updated messages and generate final response
-                messages = conversation_manager.get_messages(conversation_id)
+                # `messages` is the live conversation history, so it already
+                # includes the tool call and tool result messages added above
                 response_content, _ = await openai_client.generate_response(
                     messages,
                     tools=None,
@@ -116,15 +183,19 @@ async def chat(request: ChatRequest):
                 use_tools=False
             )
         
+        # The model calls above take time; stamp the reply when it is recorded
+        replied_at = time.time_ns()
         conversation_manager.add_message(
             conversation_id,
             MessageRole.ASSISTANT,
-            response_content
+            response_content,
+            now=replied_at
         )
         
-        return ChatResponse(
+        return ChatResponse.model_construct(
             response=response_content,
             conversation_id=conversation_id,
+            timestamp=ns_to_datetime(replied_at),
             tools_used=tools_used if tools_used else None
         )
         
@@ -133,6 +204,86 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def sse_event(data: Dict[str, Any]) -> bytes:
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, now: int = Depends(request_time)):
+    """Same as /chat, but the final answer is streamed as server-sent events
+    
+    Events are `{"delta": ...}` text chunks, then one `{"done": true, ...}`
+    event with the conversation ID and tools used, or an `{"error": ...}` event.
+    """
+    conversation_id = get_or_create_conversation(request.conversation_id, now)
+    conversation_manager.add_message(
+        conversation_id,
+        MessageRole.USER,
+        request.message,
+        now=now
+    )
+    messages = conversation_manager.get_openai_messages(conversation_id)
+    
+    async def event_stream():
+        tools_used = []
+        parts: List[str] = []
+        
+        async def forward(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+            """Relay text chunks as delta events, keeping the text for the history"""
+            # Tokens are sent in pairs to halve the per-event framing overhead
+            pending: List[str] = []
+            async for chunk in chunks:
+                parts.append(chunk)
+                pending.append(chunk)
+                if len(pending) >= 2:
+                    yield sse_event({"delta": "".join(pending)})
+                    pending.clear()
+            if pending:
+                yield sse_event({"delta": "".join(pending)})
+        
+        try:
+            if request.use_tools:
+                openai_tools = app.state.openai_tools or await refresh_openai_tools(app)
+                
+                # A direct answer is streamed as it is written; if the model
+                # calls tools instead, the answer written after they have run is
+                tool_calls: List[ToolCall] = []
+                async for event in forward(openai_client.stream_response(messages, openai_tools, tool_calls)):
+                    yield event
+                
+                if tool_calls:
+                    tools_used = await run_tool_calls(conversation_id, "".join(parts), tool_calls)
+                    parts.clear()
+                    async for event in forward(openai_client.stream_response(messages)):
+                        yield event
+            else:
+                async for event in forward(openai_client.stream_response(messages)):
+                    yield event
+            
+            conversation_manager.add_message(
+                conversation_id,
+                MessageRole.ASSISTANT,
+                "".join(parts)
+            )
+            yield sse_event({
+                "done": True,
+                "conversation_id": conversation_id,
+                "tools_used": tools_used if tools_used else None
+            })
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}")
+            yield sse_event({"error": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @app.get("/conversations")
 async def list_conversations():
     return conversation_manager.list_conversations()
@@ -146,9 +297,9 @@ async def get_conversation_messages(conversation_id: str):
     
     return [
         {
-            "role": msg.role.value,
+            "role": msg.role,
             "content": msg.content,
-            "timestamp": msg.timestamp.isoformat()
+            "timestamp": msg.timestamp_iso
         }
         for msg in messages
     ]
@@ -167,5 +318,5 @@ if __name__ == "__main__":
         "src.backend.main:app",
         host=settings.backend_host,
         port=settings.backend_port,
-        reload=True
+        **uvicorn_options(workers=settings.workers)
     )
\ No newline at end of file
@@ -3,17 +3,22 @@ Backend with agents library for elegant MCP + OpenAI integration
 """
 import logging
 import os
+import sys
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from agents import Agent, Runner
-from agents.mcp import MCPServerStdio
+from fastapi.responses import ORJSONResponse
 
-from .config import get_settings
+from .config import get_settings, uvicorn_options
 from .models import ChatRequest, ChatResponse, MessageRole
 from .conversation_manager import ConversationManager
 
+if TYPE_CHECKING:
+    from agents import Agent, Runner
+    from agents.mcp import MCPServerStdio
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -21,43 +26,65 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-conversation_manager = ConversationManager()
+conversation_manager = ConversationManager(max_history=settings.max_history)
 
-# Create MCP server as subprocess with stdio
 project_root = Path(__file__).parent.parent.parent
-mcp_server = MCPServerStdio(
-    name="chatbot-tools",
-    params={
-        "command": "uv",
-        "args": ["run", "python", "scripts/run_fastmcp_server.py"],
-        "cwd": str(project_root),
-        "env": {
-            **os.environ,
-            "PYTHONPATH": str(project_root)
-        }
-    }
-)
 
-# Create Agent with OpenAI and MCP tools
-agent = Agent(
-    name="ChatbotAssistant",
-    instructions=(
-        "You are a helpful assistant with access to various tools. "
-        "Use the available tools when they would be helpful to answer questions. "
-        "Be concise and clear in your responses."
-    ),
-    model=settings.model_name,
-    mcp_servers=[mcp_server],
-)
+# The agents library is imported and wired up in lifespan, so importing this
+# module (e.g. by the reloader) does not pull in its dependency tree
+mcp_server: Optional["MCPServerStdio"] = None
+agent: Optional["Agent"] = None
 
 # Single Runner instance for the application lifecycle
-runner = None
+runner: Optional["Runner"] = None
+
+
+def create_agent() -> tuple["MCPServerStdio", "Agent"]:
+    """Create the stdio MCP server and the Agent that uses its tools"""
+    from agents import Agent
+    from agents.mcp import MCPServerStdio
+    
+    # Spawned with the current interpreter directly: going through `uv run`
+    # adds a dependency resolution pass to every backend start
+    server = MCPServerStdio(
+        name="chatbot-tools",
+        cache_tools_list=True,
+        params={
+            "command": sys.executable,
+            "args": ["scripts/run_fastmcp_server.py"],
+            "cwd": str(project_root),
+            "env": {
+                **os.environ,
+                "PYTHONPATH": str(project_root)
+            }
+        }
+    )
+    
+    # Create Agent with OpenAI and MCP tools
+    chatbot_agent = Agent(
+        name="ChatbotAssistant",
+        instructions=(
+            "You are a helpful assistant with access to various tools. "
+            "Use the available tools when they would be helpful to answer questions. "
+            "Be concise and clear in your responses."
+        ),
+        model=settings.model_name,
+        mcp_servers=[server],
+    )
+    return server, chatbot_agent
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
-    global runner
+    global mcp_server, agent, runner
+    from agents import Runner
+    
     logger.info("Starting backend with agents integration...")
+    mcp_server, agent = create_agent()
+    
+    # Spawn the MCP subprocess once; it is reused by every request until shutdown
+    await mcp_server.connect()
     
     # Create and start runner
     runner = Runner()
@@ -70,21 +97,24 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down backend...")
     if runner:
         await runner.__aexit__(None, None, None)
+    await mcp_server.cleanup()
     logger.info("MCP server stopped")
 
 app = FastAPI(
     title="Chatbot Backend with Agents",
     description="Backend API using agents library for MCP + OpenAI",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # let browsers cache preflight responses for a day
 )
 
 @app.get("/health")
@@ -116,25 +146,9 @@ async def chat(request: ChatRequest):
             request.message
         )
         
-        # Get conversation history
-        messages = conversation_manager.get_messages(conversation_id)
-        
-        # Build prompt with history
-        prompt = ""
-        for msg in messages:
-            if msg.role == MessageRole.USER:
-                prompt += f"User: {msg.content}\n"
-            elif msg.role == MessageRole.ASSISTANT:
-                prompt += f"Assistant: {msg.content}\n"
-        
-        # Remove last newline and get only current user message if no history
-        if prompt.count("User:") == 1:
-            prompt = request.message
-        else:
-            # For conversation with history, we need special handling
-            # For now, just use the current message
-            # (agents library doesn't natively support conversation history in the same way)
-            prompt = request.message
+        # Only the current message is sent: the agents library doesn't natively
+        # support conversation history in the same way
+        prompt = request.message
         
         # Run agent with MCP tools
         logger.info(f"Processing message with agent: {prompt[:100]}...")
@@ -165,7 +179,7 @@ async def chat(request: ChatRequest):
             response_content
         )
         
-        return ChatResponse(
+        return ChatResponse.model_construct(
             response=response_content,
             conversation_id=conversation_id,
             tools_used=tools_used if tools_used else None
@@ -189,9 +203,9 @@ async def get_conversation_messages(conversation_id: str):
     
     return [
         {
-            "role": msg.role.value,
+            "role": msg.role,
             "content": msg.content,
-            "timestamp": msg.timestamp.isoformat()
+            "timestamp": msg.timestamp_iso
         }
         for msg in messages
     ]
@@ -232,5 +246,6 @@ if __name__ == "__main__":
         "src.backend.main_agents:app",
         host=settings.backend_host,
         port=settings.backend_port,
-        reload=True
+        # Single worker: each worker would spawn its own MCP subprocess
+        **uvicorn_options()
     )
\ No newline at end of file
@@ -3,15 +3,21 @@ Backend with MCP server as subprocess via stdio
 Direct integration without external agents library
 """
 import logging
-import json
+import os
+import sys
+import itertools
 import asyncio
-import subprocess
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from pathlib import Path
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from .config import get_settings
+from .config import get_settings, uvicorn_options
 from .models import ChatRequest, ChatResponse, MessageRole
 from .conversation_manager import ConversationManager
 from .openai_client import OpenAIClient
@@ -23,48 +29,67 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-conversation_manager = ConversationManager()
+conversation_manager = ConversationManager(max_history=settings.max_history)
 openai_client = OpenAIClient(settings)
 
+project_root = Path(__file__).parent.parent.parent
+
+MCP_PROTOCOL_VERSION = "2024-11-05"
+# Seconds to wait for the MCP server to answer a request
+MCP_REQUEST_TIMEOUT = 30.0
 
 class MCPSubprocessClient:
     """Client to communicate with MCP server via stdio subprocess"""
     
     def __init__(self):
-        self.process: Optional[subprocess.Popen] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
         self.reader_task: Optional[asyncio.Task] = None
+        self.writer_task: Optional[asyncio.Task] = None
+        self.stderr_task: Optional[asyncio.Task] = None
         self.tools: List[Dict[str, Any]] = []
+        # OpenAI function definitions, rebuilt only when the tool list changes
+        self._openai_tools: List[Dict[str, Any]] = []
+        # /tools response body, encoded once per tool list
+        self.tools_bytes = b"[]"
+        # Futures for in-flight requests, resolved by the reader task by JSON-RPC id
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        # Encoded requests waiting for the writer task
+        self._outbox: "asyncio.Queue[bytes]" = asyncio.Queue()
         
     async def start(self):
         """Start MCP server as subprocess"""
         try:
             # Start FastMCP server in stdio mode
-            self.process = subprocess.Popen(
-                ["uv", "run", "python", "scripts/run_fastmcp_server.py"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, "scripts/run_fastmcp_server.py",
+                cwd=str(project_root),
+                env={**os.environ, "PYTHONPATH": str(project_root)},
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=1 << 20  # tool results can be long single lines
             )
             
             logger.info("MCP subprocess started")
             
             # Start reader task for stdout
             self.reader_task = asyncio.create_task(self._read_output())
+            self.writer_task = asyncio.create_task(self._writer())
+            # stderr must be drained too: once its pipe buffer is full the
+            # server blocks on its next log write and stops answering
+            self.stderr_task = asyncio.create_task(self._drain_stderr())
             
-            # Initialize connection
-            await self._send_request({
-                "jsonrpc": "2.0",
-                "method": "initialize",
-                "params": {
-                    "clientInfo": {
-                        "name": "chatbot-backend",
-                        "version": "1.0.0"
-                    }
-                },
-                "id": 1
+            # MCP handshake: initialize, then confirm with the initialized notification
+            await self._send_request("initialize", {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {
+                    "name": "chatbot-backend",
+                    "version": "1.0.0"
+                }
             })
+            self._send_notification("notifications/initialized")
             
             # Get available tools
             await self._fetch_tools()
@@ -75,151 +100,134 @@ class MCPSubprocessClient:
     
     async def stop(self):
         """Stop MCP server subprocess"""
-        if self.reader_task:
-            self.reader_task.cancel()
+        for task in (self.reader_task, self.writer_task, self.stderr_task):
+            if task:
+                task.cancel()
             
-        if self.process:
+        if self.process and self.process.returncode is None:
             self.process.terminate()
             try:
-                await asyncio.wait_for(
-                    asyncio.create_task(self._wait_for_process()),
-                    timeout=5.0
-                )
+                await asyncio.wait_for(self.process.wait(), timeout=5.0)
             except asyncio.TimeoutError:
                 self.process.kill()
+                await self.process.wait()
             
             logger.info("MCP subprocess stopped")
     
-    async def _wait_for_process(self):
-        """Wait for process to exit"""
-        while self.process.poll() is None:
-            await asyncio.sleep(0.1)
-    
     async def _read_output(self):
-        """Read output from subprocess"""
-        while self.process and self.process.stdout:
-            try:
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, self.process.stdout.readline
-                )
-                if line:
+        """Read JSON-RPC messages from the subprocess and resolve pending requests"""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = orjson.loads(line)
+                except ValueError:
+                    # Anything that isn't JSON-RPC (e.g. startup banners)
                     logger.debug(f"MCP output: {line.strip()}")
-            except Exception as e:
-                logger.error(f"Error reading MCP output: {e}")
+                    continue
+                
+                if not isinstance(message, dict):
+                    logger.debug(f"Unexpected MCP message: {message}")
+                    continue
+                
+                if "method" in message:
+                    # Server-initiated request or notification; its id is in the
+                    # server's id space, so it must never resolve one of ours
+                    if message["method"] == "ping" and "id" in message:
+                        self._outbox.put_nowait(
+                            orjson.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {}}) + b"\n"
+                        )
+                    else:
+                        logger.debug(f"Unhandled MCP message: {message}")
+                    continue
+                
+                if "result" not in message and "error" not in message:
+                    logger.debug(f"Unexpected MCP message: {message}")
+                    continue
+                
+                future = self._pending.pop(message.get("id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+                else:
+                    logger.debug(f"Unmatched MCP response: {message}")
+        except Exception as e:
+            logger.error(f"Error reading MCP output: {e}")
+        finally:
+            # The server is gone: nobody is going to answer the outstanding requests
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("MCP subprocess closed its output"))
+            self._pending.clear()
+    
+    async def _drain_stderr(self):
+        """Forward the subprocess's stderr to the debug log"""
+        while True:
+            try:
+                line = await self.process.stderr.readline()
+            except ValueError:
+                # Line longer than the stream limit; it has been discarded
+                continue
+            if not line:
                 break
+            logger.debug("mcp-stderr: %s", line.decode(errors="replace").rstrip())
     
-    async def _send_request(self, request: dict) -> dict:
-        """Send JSON-RPC request to MCP server"""
+    async def _send_request(self, method: str, params: Optional[dict] = None) -> Any:
+        """Send JSON-RPC request to MCP server and return its result"""
         if not self.process or not self.process.stdin:
             raise RuntimeError("MCP subprocess not running")
         
-        request_str = json.dumps(request) + "\n"
-        self.process.stdin.write(request_str)
-        self.process.stdin.flush()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        self._outbox.put_nowait(orjson.dumps(request) + b"\n")
+        
+        try:
+            response = await asyncio.wait_for(future, timeout=MCP_REQUEST_TIMEOUT)
+        finally:
+            self._pending.pop(request_id, None)
         
-        # For simplicity, we'll return empty response
-        # In production, you'd need proper response handling
-        return {}
+        if "error" in response:
+            raise RuntimeError(f"MCP request {method} failed: {response['error']}")
+        return response.get("result")
+    
+    def _send_notification(self, method: str, params: Optional[dict] = None):
+        """Queue a JSON-RPC notification (no id, no response expected)"""
+        notification = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            notification["params"] = params
+        self._outbox.put_nowait(orjson.dumps(notification) + b"\n")
+    
+    async def _writer(self):
+        """Write queued requests to the subprocess, one drain per batch"""
+        while True:
+            items = [await self._outbox.get()]
+            # Whatever else was queued during this loop tick goes out in the same write
+            while not self._outbox.empty():
+                items.append(self._outbox.get_nowait())
+            self.process.stdin.writelines(items)
+            await self.process.stdin.drain()
     
     async def _fetch_tools(self):
         """Fetch available tools from MCP server"""
-        # For now, hardcode the tools since stdio communication is complex
-        # In production, you'd parse the actual response from the server
+        result = await self._send_request("tools/list")
         self.tools = [
             {
-                "name": "get_current_time",
-                "description": "Get the current date and time",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "timezone": {
-                            "type": "string",
-                            "description": "Timezone (e.g., 'UTC', 'America/New_York')",
-                            "default": "UTC"
-                        }
-                    },
-                    "required": []
-                }
-            },
-            {
-                "name": "calculate",
-                "description": "Perform basic mathematical calculations",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "expression": {
-                            "type": "string",
-                            "description": "Mathematical expression to evaluate"
-                        }
-                    },
-                    "required": ["expression"]
-                }
-            },
-            {
-                "name": "get_random_number",
-                "description": "Generate a random number within a range",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "min": {
-                            "type": "number",
-                            "description": "Minimum value",
-                            "default": 0
-                        },
-                        "max": {
-                            "type": "number",
-                            "description": "Maximum value",
-                            "default": 100
-                        }
-                    },
-                    "required": []
-                }
-            },
-            {
-                "name": "convert_temperature",
-                "description": "Convert temperature between Celsius, Fahrenheit, and Kelvin",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "value": {
-                            "type": "number",
-                            "description": "Temperature value to convert"
-                        },
-                        "from_unit": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit", "kelvin"],
-                            "description": "Source temperature unit"
-                        },
-                        "to_unit": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit", "kelvin"],
-                            "description": "Target temperature unit"
-                        }
-                    },
-                    "required": ["value", "from_unit", "to_unit"]
-                }
-            },
-            {
-                "name": "get_weather",
-                "description": "Get mock weather information for a city",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "City name"
-                        }
-                    },
-                    "required": ["city"]
-                }
+                "name": tool["name"],
+                # FastMCP sends the whole docstring; its first line is the summary
+                "description": (tool.get("description") or f"Tool: {tool['name']}").split("\n")[0].strip(),
+                "parameters": tool.get("inputSchema") or {"type": "object", "properties": {}}
             }
+            for tool in result.get("tools", [])
         ]
         
-        logger.info(f"Loaded {len(self.tools)} tools from MCP server")
-    
-    def get_openai_tools(self) -> List[Dict[str, Any]]:
-        """Convert MCP tools to OpenAI function format"""
-        return [
+        self.tools_bytes = orjson.dumps(self.tools)
+        self._openai_tools = [
             {
                 "type": "function",
                 "function": {
@@ -230,79 +238,117 @@ class MCPSubprocessClient:
             }
             for tool in self.tools
         ]
+        
+        logger.info(f"Loaded {len(self.tools)} tools from MCP server")
     
-    async def execute_tool(self, name: str, arguments: dict) -> Any:
+    def get_openai_tools(self) -> List[Dict[str, Any]]:
+        """MCP tools in OpenAI function format"""
+        return self._openai_tools
+    
+    async def execute_tool(self, name: str, arguments: dict) -> str:
         """Execute a tool via MCP server"""
-        # For simplicity, we'll simulate tool execution
-        # In production, you'd send the request to the subprocess
+        result = await self._send_request("tools/call", {"name": name, "arguments": arguments})
+        text = "\n".join(
+            item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"
+        )
+        if result.get("isError"):
+            raise RuntimeError(text or f"Tool {name} failed")
+        return text
+
+
+class ORJSONRequest(Request):
+    """Request whose JSON body is decoded with orjson"""
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route that hands endpoints an ORJSONRequest"""
+    
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
         
-        if name == "get_current_time":
-            from datetime import datetime
-            timezone = arguments.get("timezone", "UTC")
-            return f"Current time in {timezone}: {datetime.now().isoformat()}"
+        async def route_handler(request: Request) -> Response:
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
         
-        elif name == "calculate":
-            try:
-                result = eval(arguments["expression"], {"__builtins__": {}}, {})
-                return float(result)
-            except Exception as e:
-                return f"Error: {e}"
+        return route_handler
+
+
+class StaticCORSMiddleware:
+    """CORS for a fixed origin list, with every response header encoded up front
+    
+    Browsers reject `*` together with credentials, so allowed origins are
+    echoed back individually, as CORSMiddleware does.
+    """
+    
+    def __init__(self, app: ASGIApp, allow_origins: List[str], max_age: int = 86400):
+        self.app = app
+        self._origin_headers: Dict[bytes, List[Tuple[bytes, bytes]]] = {
+            origin.encode(): [
+                (b"access-control-allow-origin", origin.encode()),
+                (b"access-control-allow-credentials", b"true"),
+                (b"vary", b"Origin"),
+            ]
+            for origin in allow_origins
+        }
+        self._preflight_headers = [
+            (b"access-control-allow-methods", b"GET, POST, DELETE, OPTIONS"),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"content-length", b"0"),
+        ]
+        self._rejected_body = b"Disallowed CORS origin"
+        self._rejected_headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(self._rejected_body)).encode()),
+        ]
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        elif name == "get_random_number":
-            import random
-            min_val = arguments.get("min", 0)
-            max_val = arguments.get("max", 100)
-            return random.randint(int(min_val), int(max_val))
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
         
-        elif name == "convert_temperature":
-            value = float(arguments["value"])
-            from_unit = arguments["from_unit"].lower()
-            to_unit = arguments["to_unit"].lower()
-            
-            # Convert to celsius first
-            if from_unit == "celsius":
-                celsius = value
-            elif from_unit == "fahrenheit":
-                celsius = (value - 32) * 5/9
-            elif from_unit == "kelvin":
-                celsius = value - 273.15
-            else:
-                return f"Invalid from_unit: {from_unit}"
-            
-            # Convert from celsius to target
-            if to_unit == "celsius":
-                result = celsius
-            elif to_unit == "fahrenheit":
-                result = celsius * 9/5 + 32
-            elif to_unit == "kelvin":
-                result = celsius + 273.15
-            else:
-                return f"Invalid to_unit: {to_unit}"
-            
-            return {
-                "original_value": value,
-                "original_unit": from_unit,
-                "converted_value": round(result, 2),
-                "converted_unit": to_unit
-            }
+        cors_headers = self._origin_headers.get(origin) if origin else None
+        preflight = scope["method"] == "OPTIONS" and origin is not None and request_method is not None
         
-        elif name == "get_weather":
-            import random
-            city = arguments.get("city", "Unknown")
-            weather_conditions = ["Sunny", "Cloudy", "Rainy", "Partly Cloudy", "Snowy"]
-            
-            return {
-                "city": city,
-                "temperature": random.randint(-10, 35),
-                "unit": "celsius",
-                "condition": random.choice(weather_conditions),
-                "humidity": random.randint(30, 90),
-                "wind_speed": random.randint(0, 30),
-                "note": "This is mock weather data for demonstration purposes"
-            }
+        if preflight and cors_headers is None:
+            # Refuse the preflight outright, as CORSMiddleware does, rather
+            # than letting it reach the routes and come back as a 405
+            await send({"type": "http.response.start", "status": 400, "headers": self._rejected_headers})
+            await send({"type": "http.response.body", "body": self._rejected_body})
+            return
         
-        else:
-            return f"Unknown tool: {name}"
+        if cors_headers is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if preflight:
+            headers = cors_headers + self._preflight_headers
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_cors(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
 
 
 # Global MCP client
@@ -317,6 +363,15 @@ async def lifespan(app: FastAPI):
     # Start MCP subprocess
     await mcp_client.start()
     
+    # Nothing in the health payload changes after startup, so encode it once
+    app.state.health_bytes = orjson.dumps({
+        "status": "healthy",
+        "service": "chatbot-backend-subprocess",
+        "mcp_integration": "stdio subprocess",
+        "tools_loaded": len(mcp_client.tools),
+        "tool_names": [tool["name"] for tool in mcp_client.tools]
+    })
+    
     yield
     
     # Cleanup
@@ -328,27 +383,18 @@ app = FastAPI(
     title="Chatbot Backend with Subprocess MCP",
     description="Backend API with MCP server as subprocess",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
+# Must be set before the routes below are declared
+app.router.route_class = ORJSONRoute
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(StaticCORSMiddleware, allow_origins=settings.cors_origins)
 
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "service": "chatbot-backend-subprocess",
-        "mcp_integration": "stdio subprocess",
-        "tools_loaded": len(mcp_client.tools),
-        "tool_names": [tool["name"] for tool in mcp_client.tools] if mcp_client.tools else []
-    }
+    return Response(app.state.health_bytes, media_type="application/json")
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -371,7 +417,7 @@ async def chat(request: ChatRequest):
         )
         
         # Get conversation history
-        messages = conversation_manager.get_messages(conversation_id)
+        messages = conversation_manager.get_openai_messages(conversation_id)
         
         tools_used = []
         
@@ -398,14 +444,20 @@ async def chat(request: ChatRequest):
                     ]}
                 )
                 
-                # Execute tools
-                for tool_call in tool_calls:
-                    result = await mcp_client.execute_tool(
-                        tool_call.name,
-                        tool_call.arguments
-                    )
+                # Each call is a round trip to the MCP server, so send them all
+                # at once and record the results in the original order afterwards
+                results = await asyncio.gather(
+                    *(mcp_client.execute_tool(tc.name, tc.arguments) for tc in tool_calls),
+                    return_exceptions=True
+                )
+                
+                for tool_call, result in zip(tool_calls, results):
                     tools_used.append(tool_call.name)
                     
+                    if isinstance(result, Exception):
+                        logger.error(f"Error executing tool {tool_call.name}: {str(result)}")
+                        result = f"Error: {result}"
+                    
                     # Add tool response
                     conversation_manager.add_message(
                         conversation_id,
@@ -418,7 +470,7 @@ async def chat(request: ChatRequest):
                     )
                 
                 # Get final response
-                messages = conversation_manager.get_messages(conversation_id)
+                messages = conversation_manager.get_openai_messages(conversation_id)
                 response_content, _ = await openai_client.generate_response(
                     messages,
                     tools=None,
@@ -439,11 +491,13 @@ async def chat(request: ChatRequest):
             response_content
         )
         
-        return ChatResponse(
-            response=response_content,
-            conversation_id=conversation_id,
-            tools_used=tools_used if tools_used else None
-        )
+        # Built by hand: returning a Response skips re-validating it against ChatResponse
+        return ORJSONResponse({
+            "response": response_content,
+            "conversation_id": conversation_id,
+            "tools_used": tools_used if tools_used else None,
+            "timestamp": datetime.now()
+        })
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
@@ -453,7 +507,7 @@ async def chat(request: ChatRequest):
 @app.get("/tools")
 async def get_available_tools():
     """Get list of available MCP tools"""
-    return mcp_client.tools
+    return Response(mcp_client.tools_bytes, media_type="application/json")
 
 
 @app.get("/conversations")
@@ -471,9 +525,9 @@ async def get_conversation_messages(conversation_id: str):
     
     return [
         {
-            "role": msg.role.value,
+            "role": msg.role,
             "content": msg.content,
-            "timestamp": msg.timestamp.isoformat()
+            "timestamp": msg.timestamp_iso
         }
         for msg in messages
     ]
@@ -493,5 +547,5 @@ if __name__ == "__main__":
         "src.backend.main_subprocess:app",
         host=settings.backend_host,
         port=settings.backend_port,
-        reload=True
+        **uvicorn_options(workers=settings.workers)
     )
\ No newline at end of file
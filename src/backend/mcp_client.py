@@ -14,11 +14,23 @@ class MCPClient:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.base_url = f"http://{settings.mcp_server_host}:{settings.mcp_server_port}"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # One pooled client per process: connections are kept alive and reused
+        # by every tool call instead of paying a new TCP (and TLS) handshake
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            # Fail fast when the MCP server is down instead of waiting out the full timeout
+            timeout=httpx.Timeout(30.0, connect=2.0),
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=100,
+                max_connections=200,
+                keepalive_expiry=60
+            )
+        )
         
     async def get_available_tools(self) -> List[Dict[str, Any]]:
         try:
-            response = await self.client.get(f"{self.base_url}/tools")
+            response = await self.client.get("/tools")
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -28,7 +40,7 @@ class MCPClient:
     async def execute_tool(self, tool_call: ToolCall) -> ToolResponse:
         try:
             response = await self.client.post(
-                f"{self.base_url}/tools/execute",
+                "/tools/execute",
                 json={
                     "name": tool_call.name,
                     "arguments": tool_call.arguments
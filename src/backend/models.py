@@ -1,7 +1,17 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Deque, List, Optional, Dict, Any
+from collections import deque
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
+import time
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    """Local datetime for an epoch-nanoseconds timestamp"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=remainder // 1000)
 
 
 class MessageRole(str, Enum):
@@ -11,11 +21,51 @@ class MessageRole(str, Enum):
     TOOL = "tool"
 
 
+# Plain-str role values for comparisons against Message.role (a str, see
+# use_enum_values). Compared with ==, not `is`: role strings parsed from
+# requests are not guaranteed to be the interned literal.
+_ASSISTANT = MessageRole.ASSISTANT.value
+_TOOL = MessageRole.TOOL.value
+
+
 class Message(BaseModel):
+    # Roles are stored as plain strings, so reads need no enum .value lookup
+    model_config = ConfigDict(use_enum_values=True)
+    
     role: MessageRole
     content: str
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: int = Field(default_factory=time.time_ns, description="Epoch nanoseconds")
     metadata: Optional[Dict[str, Any]] = None
+    
+    @cached_property
+    def timestamp_iso(self) -> str:
+        """ISO timestamp, formatted only when a message is first served"""
+        return ns_to_datetime(self.timestamp).isoformat()
+    
+    def to_openai_dict(self) -> Dict[str, Any]:
+        """This message as a Chat Completions API message"""
+        openai_msg = {
+            "role": self.role,
+            "content": self.content
+        }
+        
+        if self.role == _TOOL and self.metadata and "tool_call_id" in self.metadata:
+            openai_msg["tool_call_id"] = self.metadata["tool_call_id"]
+            openai_msg["name"] = self.metadata.get("tool_name", "")
+        elif self.role == _ASSISTANT and self.metadata and "tool_calls" in self.metadata:
+            openai_msg["tool_calls"] = [
+                {
+                    "id": tc["id"],
+                    "type": "function",
+                    "function": {
+                        "name": tc["name"],
+                        "arguments": orjson.dumps(tc["arguments"]).decode()
+                    }
+                }
+                for tc in self.metadata["tool_calls"]
+            ]
+        
+        return openai_msg
 
 
 class ChatRequest(BaseModel):
@@ -46,7 +96,8 @@ class ToolResponse(BaseModel):
 
 class Conversation(BaseModel):
     id: str = Field(..., description="Unique conversation ID")
-    messages: List[Message] = Field(default_factory=list, description="List of messages")
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    messages: Deque[Message] = Field(default_factory=deque, description="Most recent messages")
+    message_count: int = Field(default=0, description="Number of messages added")
+    created_at: int = Field(default_factory=time.time_ns, description="Epoch nanoseconds")
+    updated_at: int = Field(default_factory=time.time_ns, description="Epoch nanoseconds")
     metadata: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -1,10 +1,11 @@
-import json
 import logging
-from typing import List, Optional, Dict, Any
+from itertools import dropwhile
+import orjson
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Any
 from openai import AsyncOpenAI
 from pydantic import BaseModel
 
-from .models import Message, MessageRole, ToolCall, ToolResponse
+from .models import ToolCall, ToolResponse
 from .config import Settings
 
 logger = logging.getLogger(__name__)
@@ -14,19 +15,22 @@ class OpenAIClient:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # Kept out of the bounded history so it is never evicted
+        self._system_messages = (
+            [{"role": "system", "content": settings.system_prompt}]
+            if settings.system_prompt else []
+        )
         
     async def generate_response(
         self,
-        messages: List[Message],
+        messages: Iterable[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
         use_tools: bool = True
     ) -> tuple[str, Optional[List[ToolCall]]]:
         try:
-            openai_messages = self._convert_to_openai_format(messages)
-            
             kwargs = {
                 "model": self.settings.model_name,
-                "messages": openai_messages,
+                "messages": self._system_messages + self._trim_history(messages),
                 "max_tokens": self.settings.max_tokens,
                 "temperature": self.settings.temperature,
             }
@@ -46,7 +50,7 @@ class OpenAIClient:
                     ToolCall(
                         id=tc.id,
                         name=tc.function.name,
-                        arguments=json.loads(tc.function.arguments) if tc.function.arguments else {}
+                        arguments=orjson.loads(tc.function.arguments) if tc.function.arguments else {}
                     )
                     for tc in message.tool_calls
                 ]
@@ -57,30 +61,69 @@ class OpenAIClient:
             logger.error(f"Error generating response: {str(e)}")
             raise
     
-    def _convert_to_openai_format(self, messages: List[Message]) -> List[Dict[str, Any]]:
-        openai_messages = []
-        for msg in messages:
-            openai_msg = {
-                "role": msg.role.value,
-                "content": msg.content
+    async def stream_response(
+        self,
+        messages: Iterable[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_calls: Optional[List[ToolCall]] = None
+    ) -> AsyncIterator[str]:
+        """Yield the text of a response as the model produces it
+        
+        With `tools`, the model may call them instead of answering; the calls
+        are assembled from the stream and appended to `tool_calls` once it ends.
+        """
+        try:
+            kwargs = {
+                "model": self.settings.model_name,
+                "messages": self._system_messages + self._trim_history(messages),
+                "max_tokens": self.settings.max_tokens,
+                "temperature": self.settings.temperature,
+                "stream": True,
             }
+            if tools:
+                kwargs["tools"] = tools
+                kwargs["tool_choice"] = "auto"
             
-            if msg.role == MessageRole.TOOL and msg.metadata and "tool_call_id" in msg.metadata:
-                openai_msg["tool_call_id"] = msg.metadata["tool_call_id"]
-                openai_msg["name"] = msg.metadata.get("tool_name", "")
-            elif msg.role == MessageRole.ASSISTANT and msg.metadata and "tool_calls" in msg.metadata:
-                openai_msg["tool_calls"] = [
-                    {
-                        "id": tc["id"],
-                        "type": "function",
-                        "function": {
-                            "name": tc["name"],
-                            "arguments": json.dumps(tc["arguments"])
-                        }
-                    }
-                    for tc in msg.metadata["tool_calls"]
-                ]
+            stream = await self.client.chat.completions.create(**kwargs)
+            # Tool call id, name and argument fragments, by the call's index
+            partial_calls: Dict[int, List[Any]] = {}
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    yield delta.content
+                for tc in delta.tool_calls or ():
+                    call = partial_calls.setdefault(tc.index, [None, "", []])
+                    if tc.id:
+                        call[0] = tc.id
+                    if tc.function and tc.function.name:
+                        call[1] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call[2].append(tc.function.arguments)
             
-            openai_messages.append(openai_msg)
-        return openai_messages
+            if tool_calls is not None:
+                for _, (call_id, name, arguments) in sorted(partial_calls.items()):
+                    arguments = "".join(arguments)
+                    tool_calls.append(
+                        ToolCall(id=call_id, name=name, arguments=orjson.loads(arguments) if arguments else {})
+                    )
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            raise
     
+    @staticmethod
+    def _trim_history(messages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Start the bounded history at a turn boundary
+        
+        The window can cut a turn anywhere, and the API rejects a tool message
+        that doesn't follow its assistant tool call, so everything before the
+        first remaining user message is dropped.
+        """
+        history = list(messages)
+        for start, message in enumerate(history):
+            if message["role"] == "user":
+                return history[start:]
+        # The current turn alone overflows the window; keep it from its first
+        # assistant message, whose tool results all follow it
+        return list(dropwhile(lambda msg: msg["role"] == "tool", history))
@@ -2,15 +2,70 @@ import streamlit as st
 import httpx
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
 import json
 import logging
+import threading
 from audio_transcriber import get_transcriber
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BACKEND_URL = "http://localhost:8000"
+MCP_SERVER_URL = "http://localhost:8001"
+
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """One pooled client for the whole app, so reruns and messages reuse its connections"""
+    return httpx.Client(
+        base_url=BACKEND_URL,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    )
+
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """One event loop for every rerun; asyncio.run() would create and close
+    a loop per call, which also breaks clients bound to the previous loop"""
+    return asyncio.new_event_loop()
+
+
+@st.cache_resource
+def get_event_loop_lock() -> threading.Lock:
+    return threading.Lock()
+
+
+def run_async(coro):
+    """Run a coroutine on the shared loop. Each browser session reruns the
+    script in its own thread, so sessions take turns on the loop."""
+    with get_event_loop_lock():
+        return get_event_loop().run_until_complete(coro)
+
+
+@st.cache_resource
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async client; only ever used on the loop from get_event_loop()"""
+    return httpx.AsyncClient(
+        base_url=BACKEND_URL,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    )
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def probe_health(url: str) -> Tuple[bool, Optional[int], Dict[str, Any]]:
+    """GET {url}/health, returning (ok, status code, payload); cached briefly
+    since every chat message reruns the whole script"""
+    try:
+        response = get_http_client().get(f"{url}/health", timeout=2.0)
+    except httpx.HTTPError:
+        return False, None, {}
+    if response.status_code != 200:
+        return False, response.status_code, {}
+    return True, response.status_code, response.json()
 
 
 class ChatbotUI:
@@ -28,21 +83,59 @@ class ChatbotUI:
             st.session_state.voice_input = None
     
     async def send_message(self, message: str, use_tools: bool) -> Dict[str, Any]:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.backend_url}/chat",
-                    json={
-                        "message": message,
-                        "conversation_id": st.session_state.conversation_id,
-                        "use_tools": use_tools
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(f"Error sending message: {str(e)}")
-                return {"error": str(e)}
+        try:
+            response = await get_async_http_client().post(
+                "/chat",
+                json={
+                    "message": message,
+                    "conversation_id": st.session_state.conversation_id,
+                    "use_tools": use_tools
+                }
+            )
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error sending message: {str(e)}")
+            return {"error": str(e)}
+    
+    def stream_message(self, message: str, use_tools: bool, result: Dict[str, Any]) -> Iterator[str]:
+        """Yield the assistant reply as it streams in from /chat/stream
+        
+        The conversation ID and tools used (or an error) are stored in `result`
+        once the stream ends. Backends without the streaming endpoint fall back
+        to the blocking /chat call.
+        """
+        payload = {
+            "message": message,
+            "conversation_id": st.session_state.conversation_id,
+            "use_tools": use_tools
+        }
+        try:
+            with get_http_client().stream("POST", "/chat/stream", json=payload) as response:
+                streaming = response.status_code != 404
+                if streaming:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line.startswith("data: "):
+                            continue
+                        event = json.loads(line[6:])
+                        if "delta" in event:
+                            yield event["delta"]
+                        elif "error" in event:
+                            result["error"] = event["error"]
+                        elif event.get("done"):
+                            result["conversation_id"] = event["conversation_id"]
+                            result["tools_used"] = event.get("tools_used")
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}")
+            result["error"] = str(e)
+            return
+        
+        if not streaming:
+            response = run_async(self.send_message(message, use_tools))
+            result.update(response)
+            if "error" not in response:
+                yield response.get("response", "")
     
     def display_message(self, role: str, content: str, timestamp: Optional[str] = None, tools_used: Optional[list] = None):
         if role == "user":
@@ -91,18 +184,15 @@ class ChatbotUI:
             st.divider()
             
             st.caption("Backend Status")
-            backend_online = False
-            backend_info = {}
+            if st.button("Refresh status", type="secondary"):
+                probe_health.clear()
             
-            try:
-                response = httpx.get(f"{self.backend_url}/health", timeout=2.0)
-                if response.status_code == 200:
-                    st.success("Backend: Online ✅")
-                    backend_online = True
-                    backend_info = response.json()
-                else:
-                    st.error("Backend: Error ❌")
-            except:
+            backend_online, backend_status, backend_info = probe_health(self.backend_url)
+            if backend_online:
+                st.success("Backend: Online ✅")
+            elif backend_status is not None:
+                st.error("Backend: Error ❌")
+            else:
                 st.error("Backend: Offline ❌")
             
             # Check MCP status based on backend type
@@ -118,13 +208,12 @@ class ChatbotUI:
                         st.info("MCP Server: Integrated (loading...)")
                 else:
                     # Separate server mode - check port 8001
-                    try:
-                        response = httpx.get("http://localhost:8001/health", timeout=2.0)
-                        if response.status_code == 200:
-                            st.success("MCP Server: Online ✅")
-                        else:
-                            st.error("MCP Server: Error ❌")
-                    except:
+                    mcp_online, mcp_status, _ = probe_health(MCP_SERVER_URL)
+                    if mcp_online:
+                        st.success("MCP Server: Online ✅")
+                    elif mcp_status is not None:
+                        st.error("MCP Server: Error ❌")
+                    else:
                         st.error("MCP Server: Offline ❌")
             else:
                 st.info("MCP Server: Checking...")
@@ -168,7 +257,7 @@ class ChatbotUI:
             if transcriber:
                 with st.spinner("Transcribing audio..."):
                     # Raw audio bytes
-                    transcribed_text = transcriber.transcribe_audio(st.session_state.voice_input)
+                    transcribed_text = run_async(transcriber.transcribe_audio(st.session_state.voice_input))
                     
                     if transcribed_text:
                         prompt = transcribed_text
@@ -192,13 +281,17 @@ class ChatbotUI:
             with chat_container:
                 self.display_message("user", prompt, timestamp)
             
-            with st.spinner("Thinking..."):
-                response = asyncio.run(self.send_message(prompt, st.session_state.use_tools))
+            # Tokens are written into the chat bubble as they arrive
+            response = {}
+            with chat_container:
+                with st.chat_message("assistant"):
+                    assistant_message = st.write_stream(
+                        self.stream_message(prompt, st.session_state.use_tools, response)
+                    )
             
             if "error" in response:
                 st.error(f"Error: {response['error']}")
             else:
-                assistant_message = response.get("response", "")
                 conversation_id = response.get("conversation_id")
                 tools_used = response.get("tools_used")
                 response_timestamp = datetime.now().strftime("%H:%M:%S")
@@ -211,9 +304,6 @@ class ChatbotUI:
                     "tools_used": tools_used
                 })
                 
-                with chat_container:
-                    self.display_message("assistant", assistant_message, response_timestamp, tools_used)
-                
                 st.rerun()
 
 
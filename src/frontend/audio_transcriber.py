@@ -5,12 +5,13 @@
 # Scopo: Gestione trascrizione audio con OpenAI Whisper
 # ============================================
 
+import asyncio
+import base64
 import os
 import io
-import tempfile
-from typing import Optional
+from typing import List, Optional, Union
 import logging
-from openai import OpenAI
+from openai import AsyncOpenAI
 import streamlit as st
 
 logger = logging.getLogger(__name__)
@@ -23,9 +24,9 @@ class AudioTranscriber:
         if not self.api_key:
             raise ValueError("OpenAI API key is required for audio transcription")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = AsyncOpenAI(api_key=self.api_key)
     
-    def transcribe_audio(self, audio_bytes: bytes, format: str = "webm") -> Optional[str]:
+    async def transcribe_audio(self, audio_bytes: bytes, format: str = "webm") -> Optional[str]:
         """
         Transcribe audio bytes to text using OpenAI Whisper API.
         
@@ -37,21 +38,14 @@ class AudioTranscriber:
             Transcribed text or None if transcription fails
         """
         try:
-            # Create a temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{format}") as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_file_path = tmp_file.name
-            
-            # Open the file and send to Whisper API
-            with open(tmp_file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="it"  # Italian, change as needed
-                )
-            
-            # Clean up the temporary file
-            os.unlink(tmp_file_path)
+            # The API takes a (filename, file, content type) tuple, so the
+            # in-memory bytes can be sent without a temporary file
+            audio_file = io.BytesIO(audio_bytes)
+            transcript = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(f"audio.{format}", audio_file, f"audio/{format}"),
+                language="it"  # Italian, change as needed
+            )
             
             return transcript.text
             
@@ -59,24 +53,41 @@ class AudioTranscriber:
             logger.error(f"Error transcribing audio: {str(e)}")
             return None
     
-    def transcribe_from_base64(self, base64_audio: str, format: str = "webm") -> Optional[str]:
+    async def transcribe_from_base64(self, data: Union[str, bytes, bytearray], format: str = "webm") -> Optional[str]:
         """
         Transcribe base64 encoded audio to text.
         
         Args:
-            base64_audio: Base64 encoded audio string
+            data: Base64 encoded audio as str, or audio the caller has
+                already decoded as bytes, which is used as-is
             format: The audio format (default: webm)
             
         Returns:
             Transcribed text or None if transcription fails
         """
+        if isinstance(data, (bytes, bytearray)):
+            return await self.transcribe_audio(bytes(data), format)
         try:
-            import base64
-            audio_bytes = base64.b64decode(base64_audio)
-            return self.transcribe_audio(audio_bytes, format)
+            audio_bytes = base64.b64decode(data)
         except Exception as e:
             logger.error(f"Error decoding base64 audio: {str(e)}")
             return None
+        return await self.transcribe_audio(audio_bytes, format)
+    
+    async def transcribe_many(self, audio_files: List[bytes], format: str = "webm") -> List[Optional[str]]:
+        """
+        Transcribe several recordings concurrently.
+        
+        Args:
+            audio_files: The audio data of each recording
+            format: The audio format shared by all recordings (default: webm)
+            
+        Returns:
+            Transcribed text (or None) for each recording, in the same order
+        """
+        return await asyncio.gather(
+            *(self.transcribe_audio(audio_bytes, format) for audio_bytes in audio_files)
+        )
 
 
 @st.cache_resource
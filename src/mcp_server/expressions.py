@@ -0,0 +1,85 @@
+"""
+Safe evaluation of the arithmetic expressions accepted by the calculate tools
+"""
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Callable, Dict
+
+BINARY_OPERATORS: Dict[type, Callable] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS: Dict[type, Callable] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS: Dict[str, Callable] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "sqrt": math.sqrt,
+}
+
+# Larger exponents would let one request pin the CPU building huge integers
+MAX_EXPONENT = 1000
+# Nested powers can stay under MAX_EXPONENT and still explode, so integer
+# powers and products are also refused when the result would exceed this many bits
+MAX_RESULT_BITS = 10_000
+
+
+def _eval_node(node: ast.AST) -> float:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left, right = _eval_node(node.left), _eval_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            if abs(right) > MAX_EXPONENT:
+                raise ValueError("Exponent too large")
+            if isinstance(left, int) and left.bit_length() * abs(right) > MAX_RESULT_BITS:
+                raise ValueError("Result too large")
+        elif (
+            isinstance(node.op, ast.Mult)
+            and isinstance(left, int)
+            and isinstance(right, int)
+            and left.bit_length() + right.bit_length() > MAX_RESULT_BITS
+        ):
+            raise ValueError("Result too large")
+        return BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_eval_node(node.operand))
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in FUNCTIONS
+        and not node.keywords
+    ):
+        return FUNCTIONS[node.func.id](*(_eval_node(arg) for arg in node.args))
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+@lru_cache(maxsize=512)
+def evaluate(expression: str) -> float:
+    """Evaluate an arithmetic expression without eval()
+
+    Only numbers, + - * / // % **, unary +/- and the functions in FUNCTIONS
+    are accepted; anything else raises ValueError (or SyntaxError).
+    Results are cached, as agents often repeat the same calculation.
+    
+    >>> evaluate("2 ** 10 + sqrt(16)")
+    1028.0
+    >>> evaluate("((9**999)**999)**999")
+    Traceback (most recent call last):
+    ...
+    ValueError: Result too large
+    """
+    return float(_eval_node(ast.parse(expression, mode="eval").body))
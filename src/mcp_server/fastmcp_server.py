@@ -1,16 +1,51 @@
 import datetime
 import json
 import random
-from typing import Dict, Any
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Any, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import logging
 
+from cachetools import TTLCache, cached
 from fastmcp import FastMCP
 
+from .expressions import evaluate
+
 logger = logging.getLogger(__name__)
 
 # Create FastMCP server
 mcp = FastMCP("Chatbot Tools")
 
+TEMPERATURE_UNITS = ("celsius", "fahrenheit", "kelvin")
+
+# Direct conversion for every (from_unit, to_unit) pair
+TEMPERATURE_CONVERSIONS: Dict[Tuple[str, str], Callable[[float], float]] = {
+    ("celsius", "celsius"): lambda v: v,
+    ("celsius", "fahrenheit"): lambda v: v * 9/5 + 32,
+    ("celsius", "kelvin"): lambda v: v + 273.15,
+    ("fahrenheit", "celsius"): lambda v: (v - 32) * 5/9,
+    ("fahrenheit", "fahrenheit"): lambda v: v,
+    ("fahrenheit", "kelvin"): lambda v: (v - 32) * 5/9 + 273.15,
+    ("kelvin", "celsius"): lambda v: v - 273.15,
+    ("kelvin", "fahrenheit"): lambda v: (v - 273.15) * 9/5 + 32,
+    ("kelvin", "kelvin"): lambda v: v,
+}
+
+
+@lru_cache(maxsize=1024)
+def _convert_temperature(value: float, from_unit: str, to_unit: str) -> float:
+    convert = TEMPERATURE_CONVERSIONS.get((from_unit, to_unit))
+    if convert is None:
+        if from_unit not in TEMPERATURE_UNITS:
+            raise ValueError(f"Invalid from_unit: {from_unit}")
+        raise ValueError(f"Invalid to_unit: {to_unit}")
+    return round(convert(value), 2)
+
+# Agents tend to ask for the same city several times within a conversation,
+# keyed on the lower-cased name
+_weather_cache: TTLCache = TTLCache(maxsize=256, ttl=60)
+
 @mcp.tool()
 def get_current_time(timezone: str = "UTC") -> str:
     """Get the current date and time.
@@ -21,7 +56,10 @@ def get_current_time(timezone: str = "UTC") -> str:
     Returns:
         Current time in the specified timezone
     """
-    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        now = datetime.datetime.now(ZoneInfo(timezone))
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {timezone}")
     return f"Current time in {timezone}: {now.isoformat()}"
 
 @mcp.tool()
@@ -35,8 +73,7 @@ def calculate(expression: str) -> float:
         Result of the calculation
     """
     try:
-        result = eval(expression, {"__builtins__": {}}, {})
-        return float(result)
+        return evaluate(expression)
     except Exception as e:
         raise ValueError(f"Invalid expression: {str(e)}")
 
@@ -68,47 +105,18 @@ def convert_temperature(value: float, from_unit: str, to_unit: str) -> Dict[str,
     from_unit = from_unit.lower()
     to_unit = to_unit.lower()
     
-    # Convert to celsius first
-    if from_unit == "celsius":
-        celsius = value
-    elif from_unit == "fahrenheit":
-        celsius = (value - 32) * 5/9
-    elif from_unit == "kelvin":
-        celsius = value - 273.15
-    else:
-        raise ValueError(f"Invalid from_unit: {from_unit}")
-    
-    # Convert from celsius to target
-    if to_unit == "celsius":
-        result = celsius
-    elif to_unit == "fahrenheit":
-        result = celsius * 9/5 + 32
-    elif to_unit == "kelvin":
-        result = celsius + 273.15
-    else:
-        raise ValueError(f"Invalid to_unit: {to_unit}")
-    
     return {
         "original_value": value,
         "original_unit": from_unit,
-        "converted_value": round(result, 2),
+        "converted_value": _convert_temperature(value, from_unit, to_unit),
         "converted_unit": to_unit
     }
 
-@mcp.tool()
-def get_weather(city: str) -> Dict[str, Any]:
-    """Get mock weather information for a city.
-    
-    Args:
-        city: City name
-        
-    Returns:
-        Dictionary with weather information
-    """
+@cached(_weather_cache, lock=threading.Lock())
+def _mock_weather(city_key: str) -> Dict[str, Any]:
     weather_conditions = ["Sunny", "Cloudy", "Rainy", "Partly Cloudy", "Snowy"]
     
     return {
-        "city": city,
         "temperature": random.randint(-10, 35),
         "unit": "celsius",
         "condition": random.choice(weather_conditions),
@@ -117,6 +125,20 @@ def get_weather(city: str) -> Dict[str, Any]:
         "note": "This is mock weather data for demonstration purposes"
     }
 
+@mcp.tool()
+def get_weather(city: str) -> Dict[str, Any]:
+    """Get mock weather information for a city.
+    
+    Args:
+        city: City name
+        
+    Returns:
+        Dictionary with weather information
+    """
+    # A fresh dict per call, so callers never share the cached one, echoing
+    # the caller's own spelling of the city
+    return {"city": city, **_mock_weather(city.lower())}
+
 if __name__ == "__main__":
     import sys
     
@@ -2,27 +2,48 @@
 Hybrid MCP server that supports both FastMCP (for Claude) and REST API (for backend)
 """
 import asyncio
-import json
+import gzip
+import inspect
+import re
 from contextlib import asynccontextmanager
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional
 import logging
 
-from fastapi import FastAPI, HTTPException
+import orjson
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 
 from .fastmcp_server import mcp as fastmcp_server
-from .models import Tool, ExecuteToolRequest, ExecuteToolResponse
+from .models import ExecuteToolRequest, ExecuteToolResponse
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Seconds between keep-alive comments on idle /sse streams
+SSE_PING_INTERVAL = 30
+
+SSE_CONNECTED_FRAME = b'data: {"type": "connection", "status": "connected"}\n\n'
+
+# JSON Schema types for annotated parameters; anything else is a string
+JSON_SCHEMA_TYPES = {int: "integer", float: "number", bool: "boolean"}
+
+# Google-style "Args:" section and its "name (type): description" lines
+_ARGS_SECTION_RE = re.compile(r"^\s*Args:\s*$(.*?)(?=^\s*\w+:\s*$|\Z)", re.M | re.S)
+_PARAM_DOC_RE = re.compile(r"^\s+(\w+)(?:\s*\([^)]*\))?\s*:\s*(.+)$", re.M)
+
+
+@lru_cache(maxsize=None)
+def parse_param_docs(func: Callable) -> Dict[str, str]:
+    """Map parameter names to their descriptions in func's docstring"""
+    doc = inspect.getdoc(func) or ""
+    section = _ARGS_SECTION_RE.search(doc)
+    return dict(_PARAM_DOC_RE.findall(section.group(1) if section else doc))
+
+
 # Extract tools from FastMCP server
-async def get_fastmcp_tools() -> List[Tool]:
-    """Extract tools from FastMCP server and convert to our Tool model"""
+async def get_fastmcp_tools() -> List[Dict[str, Any]]:
+    """Extract tools from FastMCP server as name/description/parameters dicts"""
     tools = []
     
     # Get tools from FastMCP using the correct async API
@@ -43,27 +64,11 @@ async def get_fastmcp_tools() -> List[Tool]:
         }
         
         # Extract parameters from function signature
-        import inspect
+        param_docs = parse_param_docs(actual_func)
         sig = inspect.signature(actual_func)
         for param_name, param in sig.parameters.items():
-            param_type = "string"  # default
-            if param.annotation == int:
-                param_type = "integer"
-            elif param.annotation == float:
-                param_type = "number"
-            elif param.annotation == bool:
-                param_type = "boolean"
-            
-            # Extract description from docstring if available
-            param_desc = f"Parameter: {param_name}"
-            if actual_func.__doc__:
-                # Simple extraction from docstring
-                import re
-                doc_lines = actual_func.__doc__.split('\n')
-                for line in doc_lines:
-                    if param_name in line and ':' in line:
-                        param_desc = line.split(':', 1)[1].strip()
-                        break
+            param_type = JSON_SCHEMA_TYPES.get(param.annotation, "string")
+            param_desc = param_docs.get(param_name, f"Parameter: {param_name}")
             
             parameters["properties"][param_name] = {
                 "type": param_type,
@@ -74,12 +79,11 @@ async def get_fastmcp_tools() -> List[Tool]:
             if param.default == inspect.Parameter.empty:
                 parameters["required"].append(param_name)
         
-        tool = Tool(
-            name=tool_name,
-            description=description.split('\n')[0].strip(),  # First line as description
-            parameters=parameters
-        )
-        tools.append(tool)
+        tools.append({
+            "name": tool_name,
+            "description": description.split('\n')[0].strip(),  # First line as description
+            "parameters": parameters
+        })
     
     return tools
 
@@ -91,13 +95,15 @@ async def execute_fastmcp_tool(name: str, arguments: Dict[str, Any]) -> Any:
             tool = fastmcp_server._tool_manager._tools[name]
             func = tool.fn
             
-            # Call the function with arguments
+            # Call the function with arguments; sync tools run in a worker
+            # thread so slow ones do not stall the event loop and /sse streams
             if asyncio.iscoroutinefunction(func):
                 result = await func(**arguments)
             else:
-                result = func(**arguments)
+                result = await asyncio.to_thread(func, **arguments)
             
-            logger.info(f"Executed tool '{name}' successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executed tool '%s' successfully", name)
             return result
         else:
             raise ValueError(f"Tool '{name}' not found")
@@ -105,9 +111,32 @@ async def execute_fastmcp_tool(name: str, arguments: Dict[str, Any]) -> Any:
         logger.error(f"Error executing tool '{name}': {str(e)}")
         raise
 
+class _HybridRegistry:
+    """FastMCP tools indexed by name, with the same get/execute_tool calls as ToolRegistry"""
+    
+    def __init__(self, tools: List[Dict[str, Any]]):
+        self.tools: Dict[str, Dict[str, Any]] = {tool["name"]: tool for tool in tools}
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.tools.get(name)
+    
+    async def execute_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        return await execute_fastmcp_tool(name, arguments)
+
+def tools_sse_frame(tools: List[Dict[str, Any]]) -> bytes:
+    """Serialize the tools event sent to every new /sse client"""
+    return b"data: " + orjson.dumps({"type": "tools", "tools": tools}) + b"\n\n"
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting hybrid MCP server...")
+    # The tool set is fixed for the life of the process, so introspect it once
+    # and serialize the /tools body and the /sse tools event up front
+    tools = await get_fastmcp_tools()
+    app.state.registry = _HybridRegistry(tools)
+    app.state.tools_json = orjson.dumps(tools)
+    app.state.tools_gzip = gzip.compress(app.state.tools_json, compresslevel=6)
+    app.state.tools_sse_frame = tools_sse_frame(tools)
     yield
     logger.info("Shutting down hybrid MCP server...")
 
@@ -116,7 +145,8 @@ app = FastAPI(
     title="Hybrid MCP Server",
     description="MCP server with FastMCP tools and REST API compatibility",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -133,7 +163,7 @@ async def health_check():
 
 # MCP Standard SSE endpoint
 @app.get("/sse")
-async def mcp_sse_endpoint():
+async def mcp_sse_endpoint(request: Request):
     """
     Standard MCP Server-Sent Events endpoint.
     This provides MCP protocol over HTTP streaming.
@@ -141,27 +171,17 @@ async def mcp_sse_endpoint():
     async def event_stream():
         """Generate SSE events for MCP protocol"""
         # Initial connection event
-        yield f"data: {{\"type\": \"connection\", \"status\": \"connected\"}}\n\n"
+        yield SSE_CONNECTED_FRAME
         
         # Send available tools
-        tools = await get_fastmcp_tools()
-        tools_data = {
-            "type": "tools",
-            "tools": [
-                {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.parameters
-                }
-                for tool in tools
-            ]
-        }
-        yield f"data: {json.dumps(tools_data)}\n\n"
+        yield request.app.state.tools_sse_frame
         
-        # Keep connection alive
+        # A comment line every SSE_PING_INTERVAL seconds keeps proxies from
+        # closing the idle stream. StreamingResponse owns the receive channel
+        # and stops this generator when the client disconnects.
         while True:
-            await asyncio.sleep(30)
-            yield f"data: {{\"type\": \"ping\"}}\n\n"
+            await asyncio.sleep(SSE_PING_INTERVAL)
+            yield b": ping\n\n"
     
     return StreamingResponse(
         event_stream(),
@@ -173,47 +193,58 @@ async def mcp_sse_endpoint():
         }
     )
 
-@app.get("/tools", response_model=List[Tool])
-async def get_tools():
+@app.get("/tools")
+async def get_tools(request: Request):
     """Get available tools"""
-    tools = await get_fastmcp_tools()
-    logger.info(f"Returning {len(tools)} available tools")
-    return tools
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Returning %s available tools", len(request.app.state.registry.tools))
+    # The listing never changes, so it is compressed once at startup
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            request.app.state.tools_gzip,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return Response(
+        request.app.state.tools_json,
+        media_type="application/json",
+        headers={"Vary": "Accept-Encoding"}
+    )
 
 @app.post("/tools/execute", response_model=ExecuteToolResponse)
 async def execute_tool(request: ExecuteToolRequest):
     """Execute a tool"""
+    # 404 only for an unknown name; errors raised by the tool itself are
+    # reported in the response body
+    if app.state.registry.get(request.name) is None:
+        logger.error(f"Tool not found: {request.name}")
+        raise HTTPException(status_code=404, detail=f"Tool '{request.name}' not found")
     try:
-        logger.info(f"Executing tool: {request.name}")
-        result = await execute_fastmcp_tool(request.name, request.arguments)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Executing tool: %s", request.name)
+        result = await app.state.registry.execute_tool(request.name, request.arguments)
         return ExecuteToolResponse(result=result)
-    except ValueError as e:
-        logger.error(f"Tool not found: {request.name}")
-        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error executing tool {request.name}: {str(e)}")
         return ExecuteToolResponse(error=str(e))
 
 @app.get("/tools/{tool_name}")
-async def get_tool_details(tool_name: str):
+async def get_tool_details(tool_name: str, request: Request):
     """Get details for a specific tool"""
-    tools = await get_fastmcp_tools()
-    tool = next((t for t in tools if t.name == tool_name), None)
+    tool = request.app.state.registry.get(tool_name)
     
     if not tool:
         raise HTTPException(status_code=404, detail=f"Tool '{tool_name}' not found")
     
-    return {
-        "name": tool.name,
-        "description": tool.description,
-        "parameters": tool.parameters
-    }
+    return tool
 
 if __name__ == "__main__":
     import uvicorn
+    from src.backend.config import configure_logging, mcp_server_workers, uvicorn_options
+    configure_logging()
     uvicorn.run(
         "src.mcp_server.hybrid_server:app",
         host="localhost",
         port=8001,
-        reload=True
+        **uvicorn_options(workers=mcp_server_workers())
     )
\ No newline at end of file
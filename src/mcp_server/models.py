@@ -1,17 +1,19 @@
+import msgspec
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 
 
-class Tool(BaseModel):
-    name: str = Field(..., description="Tool name")
-    description: str = Field(..., description="Tool description")
-    parameters: Dict[str, Any] = Field(
+class Tool(msgspec.Struct):
+    """Tool definition; a Struct so the tool list encodes straight to JSON"""
+    name: str
+    description: str
+    # JSON Schema of the tool's arguments
+    parameters: Dict[str, Any] = msgspec.field(
         default_factory=lambda: {
             "type": "object",
             "properties": {},
             "required": []
-        },
-        description="Tool parameters schema"
+        }
     )
 
 
@@ -22,4 +24,22 @@ class ExecuteToolRequest(BaseModel):
 
 class ExecuteToolResponse(BaseModel):
     result: Optional[Any] = Field(None, description="Tool execution result")
-    error: Optional[str] = Field(None, description="Error message if execution failed")
\ No newline at end of file
+    error: Optional[str] = Field(None, description="Error message if execution failed")
+
+class TempResult(msgspec.Struct):
+    """convert_temperature result"""
+    original_value: float
+    original_unit: str
+    converted_value: float
+    converted_unit: str
+
+
+class WeatherResult(msgspec.Struct, kw_only=True):
+    """get_weather result; a Struct encodes faster than the equivalent dict"""
+    city: str
+    temperature: int
+    unit: str = "celsius"
+    condition: str
+    humidity: int
+    wind_speed: int
+    note: str = "This is mock weather data for demonstration purposes"
@@ -1,20 +1,20 @@
 import logging
 from contextlib import asynccontextmanager
+import msgspec
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import ORJSONResponse, Response
 
-from .models import Tool, ExecuteToolRequest, ExecuteToolResponse
-from .tools import ToolRegistry
+from .models import ExecuteToolRequest, ExecuteToolResponse
+from .tools import ToolArgumentError, ToolRegistry
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 tool_registry = ToolRegistry()
 
+# Tool results may be msgspec Structs (e.g. WeatherResult), which this encodes natively
+_encode_json = msgspec.json.Encoder().encode
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,7 +27,8 @@ app = FastAPI(
     title="MCP Test Server",
     description="Test MCP server with sample tools",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -44,22 +45,27 @@ async def health_check():
     return {"status": "healthy", "service": "mcp-test-server"}
 
 
-@app.get("/tools", response_model=List[Tool])
+@app.get("/tools")
 async def get_tools():
-    tools = tool_registry.get_tools()
-    logger.info(f"Returning {len(tools)} available tools")
-    return tools
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Returning %s available tools", len(tool_registry.entries))
+    return Response(tool_registry.get_tools_json(), media_type="application/json")
 
 
 @app.post("/tools/execute", response_model=ExecuteToolResponse)
 async def execute_tool(request: ExecuteToolRequest):
+    # 404 only for an unknown name; errors raised by the tool itself are
+    # reported in the response body
+    if tool_registry.get(request.name) is None:
+        logger.error(f"Tool not found: {request.name}")
+        raise HTTPException(status_code=404, detail=f"Tool '{request.name}' not found")
     try:
-        logger.info(f"Executing tool: {request.name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Executing tool: %s", request.name)
         result = await tool_registry.execute_tool(request.name, request.arguments)
-        return ExecuteToolResponse(result=result)
-    except ValueError as e:
-        logger.error(f"Tool not found: {request.name}")
-        raise HTTPException(status_code=404, detail=str(e))
+        return Response(_encode_json({"result": result, "error": None}), media_type="application/json")
+    except ToolArgumentError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Error executing tool {request.name}: {str(e)}")
         return ExecuteToolResponse(error=str(e))
@@ -67,11 +73,10 @@ async def execute_tool(request: ExecuteToolRequest):
 
 @app.get("/tools/{tool_name}")
 async def get_tool_details(tool_name: str):
-    tools = tool_registry.tools
-    if tool_name not in tools:
+    tool = tool_registry.get(tool_name)
+    if not tool:
         raise HTTPException(status_code=404, detail=f"Tool '{tool_name}' not found")
     
-    tool = tools[tool_name]
     return {
         "name": tool.name,
         "description": tool.description,
@@ -81,9 +86,11 @@ async def get_tool_details(tool_name: str):
 
 if __name__ == "__main__":
     import uvicorn
+    from src.backend.config import configure_logging, mcp_server_workers, uvicorn_options
+    configure_logging()
     uvicorn.run(
         "src.mcp_server.server:app",
         host="localhost",
         port=8001,
-        reload=True
+        **uvicorn_options(workers=mcp_server_workers())
     )
\ No newline at end of file
@@ -1,144 +1,231 @@
+import asyncio
 import datetime
-import json
 import random
-from typing import Dict, Any, List
+import sys
+from typing import Awaitable, Callable, Dict, Any, List, NamedTuple, Optional, Tuple
 import logging
 
-from .models import Tool
+import fastjsonschema
+import msgspec
+
+from .expressions import evaluate
+from .models import TempResult, Tool, WeatherResult
 
 logger = logging.getLogger(__name__)
 
+# Bound once so _get_current_time skips the attribute chains on every call
+_now = datetime.datetime.now
+_utc = datetime.timezone.utc
 
-class ToolRegistry:
-    def __init__(self):
-        self.tools: Dict[str, Tool] = {}
-        self.handlers: Dict[str, callable] = {}
-        self._register_default_tools()
-    
-    def _register_default_tools(self):
-        self.register_tool(
-            Tool(
-                name="get_current_time",
-                description="Get the current date and time",
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "timezone": {
-                            "type": "string",
-                            "description": "Timezone (e.g., 'UTC', 'America/New_York')",
-                            "default": "UTC"
-                        }
-                    },
-                    "required": []
+_WEATHER = ("Sunny", "Cloudy", "Rainy", "Partly Cloudy", "Snowy")
+
+# Number of values of each mock weather field: temperature -10..35,
+# humidity 30..90, wind speed 0..30 and the condition
+_TEMP_SPAN = 46
+_HUMIDITY_SPAN = 61
+_WIND_SPAN = 31
+# One draw below this decodes (mixed radix) into all four fields, uniformly
+_WEATHER_SPACE = _TEMP_SPAN * _HUMIDITY_SPAN * _WIND_SPAN * len(_WEATHER)
+
+_TEMP_UNITS = ("celsius", "fahrenheit", "kelvin")
+
+# Every conversion is linear: (from_unit, to_unit) -> (scale, offset)
+_TEMP_COEFFS: Dict[Tuple[str, str], Tuple[float, float]] = {
+    ("celsius", "celsius"): (1.0, 0.0),
+    ("celsius", "fahrenheit"): (9/5, 32.0),
+    ("celsius", "kelvin"): (1.0, 273.15),
+    ("fahrenheit", "celsius"): (5/9, -32 * 5/9),
+    ("fahrenheit", "fahrenheit"): (1.0, 0.0),
+    ("fahrenheit", "kelvin"): (5/9, 273.15 - 32 * 5/9),
+    ("kelvin", "celsius"): (1.0, -273.15),
+    ("kelvin", "fahrenheit"): (9/5, 32 - 273.15 * 9/5),
+    ("kelvin", "kelvin"): (1.0, 0.0),
+}
+
+
+# (name, description, parameters schema, handler method) of the built-in tools
+_DEFAULT_TOOLS: Tuple[Tuple[str, str, Dict[str, Any], str], ...] = (
+    (
+        "get_current_time",
+        "Get the current date and time",
+        {
+            "type": "object",
+            "properties": {
+                "timezone": {
+                    "type": "string",
+                    "description": "Timezone (e.g., 'UTC', 'America/New_York')",
+                    "default": "UTC"
                 }
-            ),
-            self._get_current_time
-        )
-        
-        self.register_tool(
-            Tool(
-                name="calculate",
-                description="Perform basic mathematical calculations",
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "expression": {
-                            "type": "string",
-                            "description": "Mathematical expression to evaluate"
-                        }
-                    },
-                    "required": ["expression"]
+            },
+            "required": []
+        },
+        "_get_current_time"
+    ),
+    (
+        "calculate",
+        "Perform basic mathematical calculations",
+        {
+            "type": "object",
+            "properties": {
+                "expression": {
+                    "type": "string",
+                    "description": "Mathematical expression to evaluate"
                 }
-            ),
-            self._calculate
-        )
-        
-        self.register_tool(
-            Tool(
-                name="get_random_number",
-                description="Generate a random number within a range",
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "min": {
-                            "type": "number",
-                            "description": "Minimum value",
-                            "default": 0
-                        },
-                        "max": {
-                            "type": "number",
-                            "description": "Maximum value",
-                            "default": 100
-                        }
-                    },
-                    "required": []
+            },
+            "required": ["expression"]
+        },
+        "_calculate"
+    ),
+    (
+        "get_random_number",
+        "Generate a random number within a range",
+        {
+            "type": "object",
+            "properties": {
+                "min": {
+                    "type": "number",
+                    "description": "Minimum value",
+                    "default": 0
+                },
+                "max": {
+                    "type": "number",
+                    "description": "Maximum value",
+                    "default": 100
                 }
-            ),
-            self._get_random_number
-        )
-        
-        self.register_tool(
-            Tool(
-                name="convert_temperature",
-                description="Convert temperature between Celsius, Fahrenheit, and Kelvin",
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "value": {
-                            "type": "number",
-                            "description": "Temperature value to convert"
-                        },
-                        "from_unit": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit", "kelvin"],
-                            "description": "Source temperature unit"
-                        },
-                        "to_unit": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit", "kelvin"],
-                            "description": "Target temperature unit"
-                        }
-                    },
-                    "required": ["value", "from_unit", "to_unit"]
+            },
+            "required": []
+        },
+        "_get_random_number"
+    ),
+    (
+        "convert_temperature",
+        "Convert temperature between Celsius, Fahrenheit, and Kelvin",
+        {
+            "type": "object",
+            "properties": {
+                "value": {
+                    "type": "number",
+                    "description": "Temperature value to convert"
+                },
+                "from_unit": {
+                    "type": "string",
+                    "enum": ["celsius", "fahrenheit", "kelvin"],
+                    "description": "Source temperature unit"
+                },
+                "to_unit": {
+                    "type": "string",
+                    "enum": ["celsius", "fahrenheit", "kelvin"],
+                    "description": "Target temperature unit"
                 }
-            ),
-            self._convert_temperature
-        )
-        
-        self.register_tool(
-            Tool(
-                name="get_weather",
-                description="Get mock weather information for a city",
-                parameters={
-                    "type": "object",
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "City name"
-                        }
-                    },
-                    "required": ["city"]
+            },
+            "required": ["value", "from_unit", "to_unit"]
+        },
+        "_convert_temperature"
+    ),
+    (
+        "get_weather",
+        "Get mock weather information for a city",
+        {
+            "type": "object",
+            "properties": {
+                "city": {
+                    "type": "string",
+                    "description": "City name"
                 }
-            ),
-            self._get_weather
-        )
+            },
+            "required": ["city"]
+        },
+        "_get_weather"
+    ),
+)
+
+
+class ToolArgumentError(ValueError):
+    """Arguments that do not match the tool's parameters schema"""
+
+
+def _build_dispatcher(
+    name: str,
+    handler: Callable[[Dict[str, Any]], Any],
+    validator: Callable[[Dict[str, Any]], Any]
+) -> Callable[[Dict[str, Any]], Awaitable[Any]]:
+    """Bake a tool's validator and its sync or async call into one coroutine function"""
+    def validate(arguments: Dict[str, Any]):
+        try:
+            validator(arguments)
+        except fastjsonschema.JsonSchemaValueException as e:
+            raise ToolArgumentError(f"Invalid arguments for tool '{name}': {e.message}")
+    
+    if asyncio.iscoroutinefunction(handler):
+        async def dispatch(arguments: Dict[str, Any]) -> Any:
+            validate(arguments)
+            return await handler(arguments)
+    else:
+        async def dispatch(arguments: Dict[str, Any]) -> Any:
+            validate(arguments)
+            return handler(arguments)
+    return dispatch
+
+
+class ToolEntry(NamedTuple):
+    tool: Tool
+    # Validates the arguments against the tool's schema, then calls its handler
+    dispatch: Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class ToolRegistry:
+    def __init__(self):
+        # Everything known about a tool, so execute_tool needs a single lookup
+        self.entries: Dict[str, ToolEntry] = {}
+        # Tool list and its JSON encoding, rebuilt lazily after a registration
+        self._tools_cache: Optional[List[Tool]] = None
+        self._tools_json: Optional[bytes] = None
+        # Mock tool data comes from the registry's own generator
+        self._rng = random.Random()
+        self._register_default_tools()
+    
+    def _register_default_tools(self):
+        for name, description, parameters, handler in _DEFAULT_TOOLS:
+            self.register_tool(Tool(name, description, parameters), getattr(self, handler))
     
     def register_tool(self, tool: Tool, handler: callable):
-        self.tools[tool.name] = tool
-        self.handlers[tool.name] = handler
-        logger.info(f"Registered tool: {tool.name}")
+        validator = fastjsonschema.compile(tool.parameters, use_default=False)
+        self.entries[tool.name] = ToolEntry(
+            tool=tool,
+            dispatch=_build_dispatcher(tool.name, handler, validator)
+        )
+        self._tools_cache = None
+        self._tools_json = None
+        logger.info("Registered tool: %s", tool.name)
+    
+    def get(self, name: str) -> Optional[Tool]:
+        entry = self.entries.get(name)
+        return entry.tool if entry else None
     
     def get_tools(self) -> List[Tool]:
-        return list(self.tools.values())
+        # Shared between callers, so it must not be modified
+        if self._tools_cache is None:
+            self._tools_cache = [entry.tool for entry in self.entries.values()]
+        return self._tools_cache
+    
+    def get_tools_json(self) -> bytes:
+        if self._tools_json is None:
+            self._tools_json = msgspec.json.encode(self.get_tools())
+        return self._tools_json
     
     async def execute_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
-        if name not in self.handlers:
+        entry = self.entries.get(name)
+        if entry is None:
             raise ValueError(f"Tool '{name}' not found")
         
-        handler = self.handlers[name]
+        # Keys decoded from JSON are fresh strings; interned ones match the
+        # handlers' literal keys by identity. This also gives the handler its
+        # own copy of the caller's dict.
+        arguments = {sys.intern(key): value for key, value in arguments.items()}
         try:
-            result = await handler(arguments) if hasattr(handler, '__await__') else handler(arguments)
-            logger.info(f"Executed tool '{name}' successfully")
+            result = await entry.dispatch(arguments)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executed tool '%s' successfully", name)
             return result
         except Exception as e:
             logger.error(f"Error executing tool '{name}': {str(e)}")
@@ -146,62 +233,51 @@ class ToolRegistry:
     
     def _get_current_time(self, arguments: Dict[str, Any]) -> str:
         timezone = arguments.get("timezone", "UTC")
-        now = datetime.datetime.now(datetime.timezone.utc)
-        return f"Current time in {timezone}: {now.isoformat()}"
+        return f"Current time in {timezone}: {_now(_utc).isoformat()}"
     
     def _calculate(self, arguments: Dict[str, Any]) -> float:
         expression = arguments.get("expression", "")
         try:
-            result = eval(expression, {"__builtins__": {}}, {})
-            return float(result)
+            return evaluate(expression)
         except Exception as e:
             raise ValueError(f"Invalid expression: {str(e)}")
     
     def _get_random_number(self, arguments: Dict[str, Any]) -> int:
         min_val = arguments.get("min", 0)
         max_val = arguments.get("max", 100)
-        return random.randint(int(min_val), int(max_val))
+        return self._rng.randint(int(min_val), int(max_val))
     
-    def _convert_temperature(self, arguments: Dict[str, Any]) -> Dict[str, float]:
+    def _convert_temperature(self, arguments: Dict[str, Any]) -> TempResult:
         value = float(arguments["value"])
-        from_unit = arguments["from_unit"].lower()
-        to_unit = arguments["to_unit"].lower()
-        
-        if from_unit == "celsius":
-            celsius = value
-        elif from_unit == "fahrenheit":
-            celsius = (value - 32) * 5/9
-        elif from_unit == "kelvin":
-            celsius = value - 273.15
-        else:
-            raise ValueError(f"Invalid from_unit: {from_unit}")
+        from_unit = arguments["from_unit"]
+        to_unit = arguments["to_unit"]
         
-        if to_unit == "celsius":
-            result = celsius
-        elif to_unit == "fahrenheit":
-            result = celsius * 9/5 + 32
-        elif to_unit == "kelvin":
-            result = celsius + 273.15
-        else:
-            raise ValueError(f"Invalid to_unit: {to_unit}")
+        # Units are already checked against the schema's lower-case enum, so
+        # only calls that bypass execute_tool ever need lower-casing
+        coeffs = _TEMP_COEFFS.get((from_unit, to_unit))
+        if coeffs is None:
+            from_unit = from_unit.lower()
+            to_unit = to_unit.lower()
+            coeffs = _TEMP_COEFFS.get((from_unit, to_unit))
+            if coeffs is None:
+                if from_unit not in _TEMP_UNITS:
+                    raise ValueError(f"Invalid from_unit: {from_unit}")
+                raise ValueError(f"Invalid to_unit: {to_unit}")
+        scale, offset = coeffs
+        result = scale * value + offset
         
-        return {
-            "original_value": value,
-            "original_unit": from_unit,
-            "converted_value": round(result, 2),
-            "converted_unit": to_unit
-        }
+        return TempResult(value, from_unit, round(result, 2), to_unit)
     
-    def _get_weather(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_weather(self, arguments: Dict[str, Any]) -> WeatherResult:
         city = arguments.get("city", "Unknown")
-        weather_conditions = ["Sunny", "Cloudy", "Rainy", "Partly Cloudy", "Snowy"]
+        sample, temperature = divmod(self._rng.randrange(_WEATHER_SPACE), _TEMP_SPAN)
+        sample, humidity = divmod(sample, _HUMIDITY_SPAN)
+        condition, wind_speed = divmod(sample, _WIND_SPAN)
         
-        return {
-            "city": city,
-            "temperature": random.randint(-10, 35),
-            "unit": "celsius",
-            "condition": random.choice(weather_conditions),
-            "humidity": random.randint(30, 90),
-            "wind_speed": random.randint(0, 30),
-            "note": "This is mock weather data for demonstration purposes"
-        }
\ No newline at end of file
+        return WeatherResult(
+            city=city,
+            temperature=temperature - 10,
+            condition=_WEATHER[condition],
+            humidity=humidity + 30,
+            wind_speed=wind_speed
+        )
\ No newline at end of file
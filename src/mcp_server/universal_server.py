@@ -2,16 +2,6 @@
 Universal MCP Server - Supports all MCP standard transports
 Compatibile con Claude Desktop, backend web, e altri client MCP
 """
-import sys
-import asyncio
-from pathlib import Path
-from typing import Optional
-
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
-from src.mcp_server.fastmcp_server import mcp
 
 def main():
     """
@@ -45,11 +35,17 @@ def main():
     
     args = parser.parse_args()
     
+    # Each transport imports only what it runs, so --help and the hybrid
+    # server do not pay for modules they never use
     if args.transport == "stdio":
+        from src.mcp_server.fastmcp_server import mcp
+        
         print("Starting MCP server with stdio transport (Claude Desktop compatible)...")
         mcp.run(transport="stdio")
         
     elif args.transport == "sse":
+        from src.mcp_server.fastmcp_server import mcp
+        
         print(f"Starting MCP server with SSE transport on {args.host}:{args.port}...")
         print("This is MCP standard HTTP streaming transport")
         print("WARNING: SSE mode does NOT include REST endpoints (/tools, /tools/execute)")
@@ -68,8 +64,11 @@ def main():
         # In hybrid mode, we run the hybrid server that has both
         # FastMCP SSE support and REST API endpoints
         import uvicorn
+        from src.backend.config import configure_logging
         from src.mcp_server.hybrid_server import app
         
+        configure_logging()
+        
         uvicorn.run(
             app,
             host=args.host,
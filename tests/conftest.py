@@ -0,0 +1,4 @@
+import os
+
+# The backend modules build their settings at import time
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.backend.main_subprocess import StaticCORSMiddleware
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+    
+    app.add_middleware(StaticCORSMiddleware, allow_origins=["http://localhost:8501"])
+    return TestClient(app)
+
+
+def test_preflight_from_allowed_origin():
+    response = make_client().options(
+        "/health",
+        headers={
+            "Origin": "http://localhost:8501",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "content-type",
+        }
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:8501"
+    assert response.headers["access-control-allow-headers"] == "content-type"
+
+
+def test_preflight_from_disallowed_origin_is_rejected():
+    response = make_client().options(
+        "/health",
+        headers={"Origin": "http://evil.example", "Access-Control-Request-Method": "GET"}
+    )
+    
+    assert response.status_code == 400
+    assert response.text == "Disallowed CORS origin"
+    assert "access-control-allow-origin" not in response.headers
+
+
+def test_simple_request_from_disallowed_origin_gets_no_cors_headers():
+    response = make_client().get("/health", headers={"Origin": "http://evil.example"})
+    
+    assert response.status_code == 200
+    assert "access-control-allow-origin" not in response.headers
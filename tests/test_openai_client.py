@@ -0,0 +1,76 @@
+from src.backend.conversation_manager import ConversationManager
+from src.backend.models import MessageRole
+from src.backend.openai_client import OpenAIClient
+
+
+def add_tool_turn(manager: ConversationManager, conversation_id: str, turn: int, tool_count: int):
+    """Add a user message, an assistant tool call turn, its tool results and the reply"""
+    manager.add_message(conversation_id, MessageRole.USER, f"question {turn}")
+    tool_calls = [
+        {"id": f"call_{turn}_{i}", "name": "get_random_number", "arguments": {}}
+        for i in range(tool_count)
+    ]
+    manager.add_message(conversation_id, MessageRole.ASSISTANT, "", metadata={"tool_calls": tool_calls})
+    for tool_call in tool_calls:
+        manager.add_message(
+            conversation_id,
+            MessageRole.TOOL,
+            "4",
+            metadata={"tool_call_id": tool_call["id"], "tool_name": tool_call["name"]}
+        )
+    manager.add_message(conversation_id, MessageRole.ASSISTANT, f"answer {turn}")
+
+
+def assert_tool_results_follow_their_call(history):
+    pending = set()
+    for message in history:
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in pending
+            pending.remove(message["tool_call_id"])
+        else:
+            pending = {tool_call["id"] for tool_call in message.get("tool_calls", [])}
+
+
+def test_trim_history_starts_at_a_user_message():
+    manager = ConversationManager(max_history=8)
+    conversation_id = manager.create_conversation()
+    add_tool_turn(manager, conversation_id, 1, tool_count=3)
+    add_tool_turn(manager, conversation_id, 2, tool_count=3)
+    
+    # The window starts inside turn 1, after its tool call was evicted
+    history = OpenAIClient._trim_history(manager.get_openai_messages(conversation_id))
+    
+    assert history[0] == {"role": "user", "content": "question 2"}
+    assert_tool_results_follow_their_call(history)
+
+
+def test_trim_history_with_more_tool_results_than_the_window():
+    manager = ConversationManager(max_history=4)
+    conversation_id = manager.create_conversation()
+    add_tool_turn(manager, conversation_id, 1, tool_count=6)
+    
+    # Only tool results and the reply are left; their tool call was evicted
+    history = OpenAIClient._trim_history(manager.get_openai_messages(conversation_id))
+    
+    assert all(message["role"] != "tool" for message in history)
+    assert_tool_results_follow_their_call(history)
+
+
+def test_trim_history_keeps_an_overflowing_turn_from_its_tool_call():
+    manager = ConversationManager(max_history=4)
+    conversation_id = manager.create_conversation()
+    manager.add_message(conversation_id, MessageRole.USER, "question")
+    manager.add_message(
+        conversation_id,
+        MessageRole.ASSISTANT,
+        "",
+        metadata={"tool_calls": [{"id": f"call_{i}", "name": "get_random_number", "arguments": {}} for i in range(3)]}
+    )
+    for i in range(3):
+        manager.add_message(conversation_id, MessageRole.TOOL, "4", metadata={"tool_call_id": f"call_{i}"})
+    
+    # The user message was evicted, but the tool call still precedes all its results
+    history = OpenAIClient._trim_history(manager.get_openai_messages(conversation_id))
+    
+    assert [message["role"] for message in history] == ["assistant", "tool", "tool", "tool"]
+    assert_tool_results_follow_their_call(history)